@@ -1,33 +1,96 @@
+# Imported first so STARTUP_PROFILE=1 can time every stage of a cold start
+import startup_profile
 import os
+import sys
+import time
+import asyncio
+import hashlib
+import threading
 from pathlib import Path
+from contextlib import asynccontextmanager
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
 from typing import List, Optional
-from fastapi import FastAPI, HTTPException
+startup_profile.mark("stdlib")
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from google.cloud import bigquery
 from dotenv import load_dotenv
+startup_profile.mark("fastapi + pydantic")
+# Local modules import nothing heavy: the BigQuery / DuckDB drivers and pyarrow load on first use
+from storage import BigQueryEngine, DuckDBEngine
+from response_cache import ResponseCache
+from query_runner import QueryRunner
+from refresh_jobs import RefreshJobRunner
+from serialization import choose_encoding, rows_response, wants_arrow
+import metrics
+import warm_start
+startup_profile.mark("local modules")
 
 # Load environment variables
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Accept requests right away; the engine warms up in the background (see warm_up_engine)
+    startup_profile.mark("server start")
+    load_warm_start()
+    startup_profile.mark("warm-start snapshot")
+    if warm_snapshot["data"] is not None:
+        # Served from the file until this finds a newer refresh in the warehouse
+        asyncio.create_task(check_warm_start())
+    threading.Thread(target=warm_up_engine, kwargs={"report": True}, name="warm-up", daemon=True).start()
+    yield
+
 app = FastAPI(
     title="FPL Draft Dashboard API",
     description="Backend API for FPL Draft League Analytics",
-    version="1.0.0"
-)
-
-# Enable CORS for frontend access
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # In production, replace with specific frontend URL
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configuration
 GCP_PROJECT_ID = os.getenv('GCP_PROJECT_ID')
 BQ_DATASET_ID = os.getenv('BQ_DATASET_ID', 'fpl_draft_data')
+# In Docker: data_pipeline is copied to backend directory
+# In local dev: data_pipeline is in parent directory
+PIPELINE_DIR = Path(__file__).resolve().parent / "data_pipeline"
+if not PIPELINE_DIR.exists():
+    PIPELINE_DIR = Path(__file__).resolve().parent.parent / "data_pipeline"
+# "bigquery" queries BQ_DATASET_ID; "local" queries the Parquet tables written by
+# STORAGE_BACKEND=local ingest runs in-process with DuckDB (see storage.py)
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'bigquery')
+LOCAL_DATA_DIR = os.getenv('LOCAL_DATA_DIR', str(PIPELINE_DIR / "local_data"))
+# League served when a request doesn't pass ?league_id= (tables hold every ingested league)
+LEAGUE_ID = int(os.getenv('FPL_LEAGUE_ID', '4193'))
+# Serve charts from the league_snapshot rollup written after each ingest (data_pipeline/materialize.py);
+# set to 0 to query the agg_* views from create_views.sql instead. Local storage has no
+# snapshot: its views are cheap enough to query directly.
+SERVE_SNAPSHOT = STORAGE_BACKEND != 'local' and os.getenv('SERVE_SNAPSHOT', '1') == '1'
+# Data only changes when /refresh-data runs, so query results are cached in-process
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv('RESPONSE_CACHE_TTL_SECONDS', '300'))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '256'))
+# The data version behind ETag / Last-Modified is looked up at most once per
+# DATA_VERSION_TTL_SECONDS per process, so a refresh run by another worker or instance
+# shows up within that window rather than within RESPONSE_CACHE_TTL_SECONDS
+DATA_VERSION_TTL_SECONDS = float(os.getenv('DATA_VERSION_TTL_SECONDS', '15'))
+# BigQuery jobs run off the event loop: at most BQ_MAX_CONCURRENT_QUERIES per process,
+# BQ_ENDPOINT_CONCURRENCY per endpoint, and identical in-flight queries share one job
+BQ_MAX_CONCURRENT_QUERIES = int(os.getenv('BQ_MAX_CONCURRENT_QUERIES', '8'))
+BQ_ENDPOINT_CONCURRENCY = int(os.getenv('BQ_ENDPOINT_CONCURRENCY', '4'))
+# Read endpoints send ETag / Last-Modified derived from the data version, and this Cache-Control
+HTTP_CACHE_CONTROL = os.getenv('HTTP_CACHE_CONTROL', 'public, max-age=60, s-maxage=300')
+CACHEABLE_PATHS = {
+    "/standings", "/momentum", "/bench-points", "/contributions",
+    "/consistency", "/draft-analysis", "/top-transfers", "/dashboard",
+}
+# A /refresh-data job still running after this long is cancelled at its next stage
+REFRESH_TIMEOUT_SECONDS = int(os.getenv('REFRESH_TIMEOUT_SECONDS', '1800'))
+# Snapshot file written by data_pipeline/materialize.py after each refresh; loaded at startup
+# so the first requests are answered without a BigQuery job. Empty disables it.
+WARM_START_PATH = os.getenv('WARM_START_PATH', str(PIPELINE_DIR / "warm_start" / "league_snapshot.arrow"))
+# Send a Server-Timing header (query / serialize / total) with every response; /metrics is always on
+SERVER_TIMING = os.getenv('SERVER_TIMING', '0') == '1'
 
 # Ensure GOOGLE_APPLICATION_CREDENTIALS points to the correct file path
 if os.getenv("GOOGLE_APPLICATION_CREDENTIALS"):
@@ -38,8 +101,13 @@ if os.getenv("GOOGLE_APPLICATION_CREDENTIALS"):
         if resolved_path.exists():
             os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = str(resolved_path)
 
-# Initialize BigQuery client
-client = bigquery.Client(project=GCP_PROJECT_ID)
+# Initialize the query engine (nothing connects until warm_up_engine or the first query)
+if STORAGE_BACKEND == 'local':
+    engine = DuckDBEngine(LOCAL_DATA_DIR, PIPELINE_DIR / "create_views.sql")
+else:
+    engine = BigQueryEngine(GCP_PROJECT_ID, BQ_DATASET_ID)
+response_cache = ResponseCache(max_entries=RESPONSE_CACHE_MAX_ENTRIES, ttl_seconds=RESPONSE_CACHE_TTL_SECONDS)
+query_runner = QueryRunner(max_workers=BQ_MAX_CONCURRENT_QUERIES, per_endpoint_limit=BQ_ENDPOINT_CONCURRENCY)
 
 # ============================================================================
 # Pydantic Models (Response Schemas)
@@ -87,18 +155,292 @@ class TopTransfersEntry(BaseModel):
     manager_name: str
     total_points: int
 
+class Dashboard(BaseModel):
+    """Every chart's dataset in one payload; charts not requested via ?fields= are omitted."""
+    standings: Optional[List[StandingEntry]] = None
+    momentum: Optional[List[MomentumEntry]] = None
+    bench_points: Optional[List[BenchPointsEntry]] = None
+    contributions: Optional[List[PlayerContribution]] = None
+    consistency: Optional[List[ConsistencyEntry]] = None
+    draft_analysis: Optional[List[DraftPickAnalysis]] = None
+    top_transfers: Optional[List[TopTransfersEntry]] = None
+
 # ============================================================================
 # Helper Functions
 # ============================================================================
 
-def run_query(query: str):
-    """Execute a BigQuery query and return results as list of dicts."""
+def league_params(league_id: Optional[int]):
+    """Query parameters selecting the requested league, defaulting to FPL_LEAGUE_ID."""
+    return {"league_id": league_id or LEAGUE_ID}
+
+def view_table(view_name: str):
+    """Name of a table, or of a view from create_views.sql, as the query engine expects it."""
+    return engine.table(view_name)
+
+def execute_query(query: str, params: Optional[dict] = None, endpoint: str = "default"):
+    """Blocking: runs a query on the storage engine and returns results as a pyarrow Table."""
+    started = time.perf_counter()
     try:
-        query_job = client.query(query)
-        results = query_job.result()
-        return [dict(row) for row in results]
+        rows, stats = engine.query(query, params)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"BigQuery error: {str(e)}")
+        metrics.observe_query(endpoint, engine.name, time.perf_counter() - started, failed=True)
+        raise HTTPException(status_code=500, detail=f"Query error ({engine.name}): {str(e)}")
+    metrics.observe_query(endpoint, engine.name, time.perf_counter() - started, stats)
+    return rows
+
+async def run_query(query: str, params: Optional[dict] = None, endpoint: str = "default", cache: bool = True):
+    """
+    Execute a query and return results as a pyarrow Table, which rows_response
+    serializes column by column without building per-row objects.
+    Results are served from response_cache, keyed by query text and parameter values;
+    misses run through query_runner, so concurrent identical queries share one job.
+    """
+    key = (query, tuple(sorted((params or {}).items())))
+    if cache:
+        hit, rows = response_cache.get(key)
+        if hit:
+            return rows
+    version = response_cache.version
+    started = time.perf_counter()
+    rows = await query_runner.run(endpoint, (version, key), execute_query, query, params, endpoint)
+    # Includes time spent waiting on a coalesced job or an endpoint slot
+    metrics.record_request_phase("query", started, time.perf_counter())
+    # Skip the store if a refresh landed while the job ran
+    if cache and response_cache.version == version:
+        response_cache.set(key, rows)
+    return rows
+
+def snapshot_charts(row):
+    """
+    Splits a one-row league_snapshot table into {chart name: table of the chart's rows}.
+    Each chart column is an array of structs; its rows are sliced out without copying.
+    """
+    import pyarrow as pa
+
+    charts = {}
+    for name in row.column_names:
+        column = row.column(name)
+        if row.num_rows and pa.types.is_list(column.type) and pa.types.is_struct(column.type.value_type):
+            values = column.combine_chunks().flatten()
+            charts[name] = pa.Table.from_arrays(values.flatten(), names=[field.name for field in values.type])
+    return charts
+
+async def get_snapshot(league_id: Optional[int], endpoint: str):
+    """
+    Latest league_snapshot row for a league: every chart's rows as a pyarrow Table,
+    keyed by chart name. Returns an empty dict if the league has no snapshot yet.
+    Leagues in the warm-start snapshot are served from it without a query.
+    """
+    snapshot = warm_snapshot["data"]
+    if snapshot is not None and (league_id or LEAGUE_ID) in snapshot["leagues"]:
+        return snapshot_charts(snapshot["leagues"][league_id or LEAGUE_ID])
+    query = f"""
+        SELECT * EXCEPT (league_id)
+        FROM {view_table('league_snapshot')}
+        WHERE league_id = @league_id
+        ORDER BY refreshed_at DESC
+        LIMIT 1
+    """
+    rows = await run_query(query, league_params(league_id), endpoint=endpoint)
+    return snapshot_charts(rows)
+
+# ============================================================================
+# Startup & Readiness
+# ============================================================================
+
+# Set once the engine is initialized; /ready reports it without running a query
+readiness = {"ready": False, "error": None, "seconds": None}
+
+def warm_up_engine(report: bool = False):
+    """
+    Builds the BigQuery client (or loads the local tables) ahead of the first request,
+    so no visitor waits for it. Runs on a background thread started at app startup.
+    """
+    started = time.perf_counter()
+    try:
+        engine.warm_up()
+        readiness.update(ready=True, error=None, seconds=round(startup_profile.elapsed(), 3))
+    except Exception as e:
+        readiness["error"] = str(e)
+        print(f"Engine warm-up failed: {e}")
+    if report:
+        startup_profile.record(f"engine warm-up ({engine.name})", time.perf_counter() - started)
+        startup_profile.report()
+
+# Leagues loaded from WARM_START_PATH (see warm_start.py); "verified" once a data
+# version lookup has run, and "data" dropped as soon as one finds a newer refresh
+warm_snapshot = {"data": None, "verified": False}
+
+def load_warm_start(after_refresh: Optional[str] = None):
+    """
+    Loads the warm-start snapshot when serving from league_snapshot. After a refresh
+    run by this process, the file is kept (already verified) only if it holds the new
+    refresh after_refresh, i.e. its export succeeded.
+    """
+    snapshot = None
+    if SERVE_SNAPSHOT:
+        try:
+            snapshot = warm_start.load(WARM_START_PATH)
+        except Exception as e:
+            print(f"Failed to load the warm-start snapshot: {e}")
+    if snapshot is None or after_refresh is None:
+        warm_snapshot.update(data=snapshot, verified=False)
+    else:
+        warm_snapshot.update(data=snapshot if snapshot["refresh_id"] == after_refresh else None, verified=True)
+
+# ============================================================================
+# HTTP Caching
+# ============================================================================
+
+# Last data version this process has seen, to notice refreshes run elsewhere, and
+# when it was looked up (time.monotonic(); None forces the next lookup)
+last_seen_data_version = {"updated_at": None, "checked_at": None}
+
+async def get_data_version():
+    """
+    When the served data last changed: the newest league_snapshot refresh (or the
+    newest watermark write when SERVE_SNAPSHOT=0), or None before the first refresh.
+    The lookup is held for DATA_VERSION_TTL_SECONDS, apart from the response cache; when
+    it reveals a refresh this process did not run, every cached response is dropped too.
+    Until the first lookup has run, the warm-start snapshot's version is used instead,
+    so a cold start needs no query; a lookup that finds a newer version drops the snapshot.
+    """
+    snapshot = warm_snapshot["data"]
+    if snapshot is not None and not warm_snapshot["verified"]:
+        return snapshot["refreshed_at"]
+    return await lookup_data_version()
+
+async def check_warm_start():
+    """Background check at startup: is the warm-start snapshot still the latest refresh?"""
+    while warm_snapshot["data"] is not None and not warm_snapshot["verified"]:
+        if await lookup_data_version() is not None:
+            warm_snapshot["verified"] = True
+        else:
+            # Warehouse not reachable yet (e.g. credentials); keep serving the snapshot
+            await asyncio.sleep(30)
+
+async def lookup_data_version():
+    """Queries the data version unless the last lookup is recent; see get_data_version."""
+    checked_at = last_seen_data_version["checked_at"]
+    if checked_at is not None and time.monotonic() - checked_at < DATA_VERSION_TTL_SECONDS:
+        return last_seen_data_version["updated_at"]
+    table, column = ("league_snapshot", "refreshed_at") if SERVE_SNAPSHOT else ("meta_gameweek_watermark", "scraped_at")
+    query = f"SELECT MAX({column}) AS updated_at FROM {view_table(table)}"
+    try:
+        rows = await run_query(query, endpoint="data-version", cache=False)
+    except HTTPException:
+        return None
+    updated_at = rows.column("updated_at")[0].as_py() if rows.num_rows else None
+    snapshot = warm_snapshot["data"]
+    if snapshot is not None and updated_at is not None and updated_at != snapshot["refreshed_at"]:
+        warm_snapshot["data"] = None
+        response_cache.bump_version()
+    if last_seen_data_version["updated_at"] not in (None, updated_at):
+        response_cache.bump_version()
+    last_seen_data_version.update(updated_at=updated_at, checked_at=time.monotonic())
+    return updated_at
+
+def etag_matches(if_none_match: str, etag: str):
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    # If-None-Match uses weak comparison: W/"x" matches "x"
+    return "*" in tags or etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+@app.middleware("http")
+async def conditional_get(request: Request, call_next):
+    """
+    Adds validators to read endpoints and answers matching If-None-Match /
+    If-Modified-Since with 304 before the endpoint (and BigQuery) runs.
+    """
+    if request.method != "GET" or request.url.path not in CACHEABLE_PATHS:
+        return await call_next(request)
+    updated_at = await get_data_version()
+    if updated_at is None:
+        return await call_next(request)
+
+    # Strong ETag: one per data version, URL (path + query string) and representation
+    representation = f"{'arrow' if wants_arrow(request) else 'json'}:{choose_encoding(request)}"
+    digest = hashlib.sha256(f"{updated_at.isoformat()}|{request.url.path}?{request.url.query}|{representation}".encode())
+    headers = {
+        "ETag": f'"{digest.hexdigest()[:32]}"',
+        "Last-Modified": format_datetime(updated_at.astimezone(timezone.utc), usegmt=True),
+        "Cache-Control": HTTP_CACHE_CONTROL,
+        "Vary": "Accept, Accept-Encoding",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    not_modified = False
+    if if_none_match is not None:
+        not_modified = etag_matches(if_none_match, headers["ETag"])
+    elif if_modified_since is not None:
+        try:
+            not_modified = updated_at.replace(microsecond=0) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            pass
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+
+    response = await call_next(request)
+    if response.status_code == 200:
+        response.headers.update(headers)
+    return response
+
+# ============================================================================
+# Metrics
+# ============================================================================
+
+@app.middleware("http")
+async def record_metrics(request: Request, call_next):
+    """
+    Records latency and response size per route (conditional_get runs inside this,
+    so 304s count too) and, with SERVER_TIMING=1, sends the request's phase timings.
+    """
+    started = time.perf_counter()
+    timings = metrics.start_request_timings()
+    response = await call_next(request)
+    finished = time.perf_counter()
+    elapsed = finished - started
+
+    # Route templates keep label values bounded (/refresh-data/{job_id}, not every job ID);
+    # 304s are answered before routing, so they are labelled with their (fixed) path
+    route = request.scope.get("route")
+    if route is not None:
+        route_path = route.path
+    elif request.url.path in CACHEABLE_PATHS:
+        route_path = request.url.path
+    else:
+        route_path = "unmatched"
+    metrics.REQUEST_DURATION.observe(elapsed, method=request.method, route=route_path, status=response.status_code)
+    if "content-length" in response.headers:
+        metrics.RESPONSE_SIZE.observe(int(response.headers["content-length"]), route=route_path)
+    if SERVER_TIMING:
+        timings["total"] = (started, finished)
+        response.headers["Server-Timing"] = metrics.server_timing_header(timings)
+        response.headers["Timing-Allow-Origin"] = "*"
+    return response
+
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus metrics: request latency, query jobs, serialization, caches."""
+    cache = response_cache.stats()
+    runner = query_runner.stats()
+    body = metrics.render(counters={
+        "fpl_api_response_cache_hits_total": ("Query results served from the in-process cache.", cache["hits"]),
+        "fpl_api_response_cache_misses_total": ("Query results not found in the in-process cache.", cache["misses"]),
+        "fpl_api_query_runner_executed_total": ("Query jobs started by the query runner.", runner["executed"]),
+        "fpl_api_query_runner_coalesced_total": ("Queries that joined an identical in-flight job.", runner["coalesced"]),
+    })
+    return Response(content=body, media_type="text/plain; version=0.0.4")
+
+# Enable CORS for frontend access. Added after the other middleware so it is the
+# outermost one and 304 responses carry CORS headers too.
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],  # In production, replace with specific frontend URL
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified", "Server-Timing"],
+)
 
 # ============================================================================
 # API Endpoints
@@ -110,83 +452,116 @@ def read_root():
     return {
         "service": "FPL Draft Dashboard API",
         "status": "running",
+        "storage": STORAGE_BACKEND,
         "gcp_project": GCP_PROJECT_ID,
-        "dataset": BQ_DATASET_ID
+        "dataset": BQ_DATASET_ID,
+        "league_id": LEAGUE_ID
+    }
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 200 once the query engine is initialized. Never runs a query."""
+    if not readiness["ready"] and readiness["error"] is not None:
+        # A failed warm-up (e.g. credentials not available yet) is retried by the next probe
+        await asyncio.get_running_loop().run_in_executor(None, warm_up_engine)
+    if not readiness["ready"]:
+        raise HTTPException(status_code=503, detail=readiness["error"] or "Warming up")
+    snapshot = warm_snapshot["data"]
+    return {
+        "status": "ready",
+        "storage": engine.name,
+        "startup_seconds": readiness["seconds"],
+        "warm_start_refresh_id": snapshot["refresh_id"] if snapshot else None,
     }
 
 @app.get("/health")
-def health_check():
-    """Verify BigQuery connectivity."""
+async def health_check():
+    """Verify connectivity to the storage engine."""
     try:
-        query = f"SELECT COUNT(*) as count FROM `{GCP_PROJECT_ID}.{BQ_DATASET_ID}.dim_entries`"
-        result = run_query(query)
+        query = f"SELECT COUNT(*) as count FROM {view_table('dim_entries')} WHERE league_id = @league_id"
+        result = await run_query(query, league_params(None), endpoint="health", cache=False)
         return {
             "status": "healthy",
-            "bigquery_connected": True,
-            "manager_count": result[0]['count']
+            "storage": engine.name,
+            "bigquery_connected": engine.name == "bigquery",
+            "manager_count": result.column("count")[0].as_py(),
+            "response_cache": response_cache.stats(),
+            "query_runner": query_runner.stats()
         }
     except Exception as e:
         raise HTTPException(status_code=503, detail=f"Service unavailable: {str(e)}")
 
-@app.get("/standings", response_model=List[StandingEntry])
-def get_standings():
-    """Get current league standings (total points and rank)."""
+# Chart data: shared by the per-chart routes below and by /dashboard
+
+async def standings_rows(league_id: Optional[int] = None):
+    if SERVE_SNAPSHOT:
+        return (await get_snapshot(league_id, "standings")).get("standings", [])
     query = f"""
         SELECT entry_id, manager_name, total_points, rank
-        FROM `{GCP_PROJECT_ID}.{BQ_DATASET_ID}.agg_league_standings`
+        FROM {view_table('agg_league_standings')}
+        WHERE league_id = @league_id
         ORDER BY rank ASC
     """
-    return run_query(query)
+    return await run_query(query, league_params(league_id), endpoint="standings")
 
-@app.get("/momentum", response_model=List[MomentumEntry])
-def get_momentum():
-    """Get manager form guide (points in last 4 gameweeks)."""
+async def momentum_rows(league_id: Optional[int] = None):
+    if SERVE_SNAPSHOT:
+        return (await get_snapshot(league_id, "momentum")).get("momentum", [])
     query = f"""
         SELECT entry_id, manager_name, total_points_last_4_gw
-        FROM `{GCP_PROJECT_ID}.{BQ_DATASET_ID}.agg_manager_momentum`
+        FROM {view_table('agg_manager_momentum')}
+        WHERE league_id = @league_id
         ORDER BY total_points_last_4_gw DESC
     """
-    return run_query(query)
+    return await run_query(query, league_params(league_id), endpoint="momentum")
 
-@app.get("/bench-points", response_model=List[BenchPointsEntry])
-def get_bench_points():
-    """Get points left on the bench per manager."""
+async def bench_points_rows(league_id: Optional[int] = None):
+    if SERVE_SNAPSHOT:
+        return (await get_snapshot(league_id, "bench-points")).get("bench_points", [])
     query = f"""
         SELECT entry_id, manager_name, bench_points
-        FROM `{GCP_PROJECT_ID}.{BQ_DATASET_ID}.agg_bench_points`
+        FROM {view_table('agg_bench_points')}
+        WHERE league_id = @league_id
         ORDER BY bench_points DESC
     """
-    return run_query(query)
+    return await run_query(query, league_params(league_id), endpoint="bench-points")
 
-@app.get("/contributions", response_model=List[PlayerContribution])
-def get_contributions(manager_name: Optional[str] = None):
-    """Get player points contribution breakdown (optionally filter by manager)."""
-    base_query = f"""
+async def contributions_rows(manager_name: Optional[str] = None, league_id: Optional[int] = None):
+    if SERVE_SNAPSHOT:
+        rows = (await get_snapshot(league_id, "contributions")).get("contributions", [])
+        if manager_name and not isinstance(rows, list):
+            import pyarrow.compute as pc
+
+            rows = rows.filter(pc.equal(rows.column("manager_name"), manager_name))
+        return rows
+    query = f"""
         SELECT entry_id, manager_name, web_name, total_points
-        FROM `{GCP_PROJECT_ID}.{BQ_DATASET_ID}.agg_player_contribution`
+        FROM {view_table('agg_player_contribution')}
+        WHERE league_id = @league_id
     """
+    params = league_params(league_id)
     
     if manager_name:
-        query = base_query + f" WHERE manager_name = '{manager_name}'"
-    else:
-        query = base_query
+        query += " AND manager_name = @manager_name"
+        params["manager_name"] = manager_name
     
     query += " ORDER BY total_points DESC"
-    return run_query(query)
+    return await run_query(query, params, endpoint="contributions")
 
-@app.get("/consistency", response_model=List[ConsistencyEntry])
-def get_consistency():
-    """Get weekly points for each manager (for consistency analysis/box plots)."""
+async def consistency_rows(league_id: Optional[int] = None):
+    if SERVE_SNAPSHOT:
+        return (await get_snapshot(league_id, "consistency")).get("consistency", [])
     query = f"""
         SELECT gameweek, entry_id, manager_name, weekly_points
-        FROM `{GCP_PROJECT_ID}.{BQ_DATASET_ID}.agg_manager_consistency`
+        FROM {view_table('agg_manager_consistency')}
+        WHERE league_id = @league_id
         ORDER BY gameweek ASC, manager_name ASC
     """
-    return run_query(query)
+    return await run_query(query, league_params(league_id), endpoint="consistency")
 
-@app.get("/draft-analysis", response_model=List[DraftPickAnalysis])
-def get_draft_analysis():
-    """Get draft pick performance analysis."""
+async def draft_analysis_rows(league_id: Optional[int] = None):
+    if SERVE_SNAPSHOT:
+        return (await get_snapshot(league_id, "draft-analysis")).get("draft_analysis", [])
     query = f"""
         SELECT 
             manager_name, 
@@ -196,85 +571,169 @@ def get_draft_analysis():
             player_name, 
             total_points_contributed, 
             pick_bucket
-        FROM `{GCP_PROJECT_ID}.{BQ_DATASET_ID}.agg_draft_picks_analysis`
+        FROM {view_table('agg_draft_picks_analysis')}
+        WHERE league_id = @league_id
         ORDER BY pick ASC
     """
-    return run_query(query)
+    return await run_query(query, league_params(league_id), endpoint="draft-analysis")
 
-@app.get("/top-transfers", response_model=List[TopTransfersEntry])
-def get_top_transfers():
-    """Get top performing transfer players."""
+async def top_transfers_rows(league_id: Optional[int] = None):
+    if SERVE_SNAPSHOT:
+        return (await get_snapshot(league_id, "top-transfers")).get("top_transfers", [])
     query = f"""
         SELECT player_name, manager_name, total_points
-        FROM `{GCP_PROJECT_ID}.{BQ_DATASET_ID}.agg_top_transfers`
+        FROM {view_table('agg_top_transfers')}
+        WHERE league_id = @league_id
         ORDER BY total_points DESC
         LIMIT 20
     """
-    return run_query(query)
+    return await run_query(query, league_params(league_id), endpoint="top-transfers")
+
+@app.get("/standings", response_model=List[StandingEntry])
+async def get_standings(request: Request, league_id: Optional[int] = None):
+    """Get current league standings (total points and rank)."""
+    return rows_response(request, await standings_rows(league_id))
+
+@app.get("/momentum", response_model=List[MomentumEntry])
+async def get_momentum(request: Request, league_id: Optional[int] = None):
+    """Get manager form guide (points in last 4 gameweeks)."""
+    return rows_response(request, await momentum_rows(league_id))
+
+@app.get("/bench-points", response_model=List[BenchPointsEntry])
+async def get_bench_points(request: Request, league_id: Optional[int] = None):
+    """Get points left on the bench per manager."""
+    return rows_response(request, await bench_points_rows(league_id))
+
+@app.get("/contributions", response_model=List[PlayerContribution])
+async def get_contributions(request: Request, manager_name: Optional[str] = None, league_id: Optional[int] = None):
+    """Get player points contribution breakdown (optionally filter by manager)."""
+    return rows_response(request, await contributions_rows(manager_name, league_id))
+
+@app.get("/consistency", response_model=List[ConsistencyEntry])
+async def get_consistency(request: Request, league_id: Optional[int] = None):
+    """Get weekly points for each manager (for consistency analysis/box plots)."""
+    return rows_response(request, await consistency_rows(league_id))
+
+@app.get("/draft-analysis", response_model=List[DraftPickAnalysis])
+async def get_draft_analysis(request: Request, league_id: Optional[int] = None):
+    """Get draft pick performance analysis."""
+    return rows_response(request, await draft_analysis_rows(league_id))
+
+@app.get("/top-transfers", response_model=List[TopTransfersEntry])
+async def get_top_transfers(request: Request, league_id: Optional[int] = None):
+    """Get top performing transfer players."""
+    return rows_response(request, await top_transfers_rows(league_id))
+
+@app.get("/dashboard", response_model=Dashboard)
+async def get_dashboard(request: Request, fields: Optional[str] = None, league_id: Optional[int] = None):
+    """
+    Get every chart's dataset in one response (or only the comma-separated ?fields=).
+    Charts are fetched concurrently; from the league snapshot they all share one read.
+    """
+    charts = {
+        "standings": standings_rows,
+        "momentum": momentum_rows,
+        "bench_points": bench_points_rows,
+        "contributions": contributions_rows,
+        "consistency": consistency_rows,
+        "draft_analysis": draft_analysis_rows,
+        "top_transfers": top_transfers_rows,
+    }
+    requested = [f.strip() for f in fields.split(",") if f.strip()] if fields else list(charts)
+    unknown = [f for f in requested if f not in charts]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(charts)}"
+        )
+    results = await asyncio.gather(*(charts[f](league_id=league_id) for f in requested))
+    return rows_response(request, dict(zip(requested, results)))
 
 # ============================================================================
 # Data Pipeline Management
 # ============================================================================
 
-@app.post("/refresh-data")
+def run_pipeline(on_stage):
+    """
+    Runs data_pipeline/ingest.py in this process, with the same defaults as its CLI.
+    The module is imported on the first refresh and reused after that.
+    """
+    if str(PIPELINE_DIR) not in sys.path:
+        sys.path.insert(0, str(PIPELINE_DIR))
+    import ingest
+
+    refresh_id = ingest.run_ingestion(
+        incremental=ingest.INGEST_MODE == "incremental",
+        stream=ingest.INGEST_STREAM,
+        storage=ingest.STORAGE_BACKEND,
+        on_stage=on_stage,
+    )
+    return {"refresh_id": refresh_id}
+
+def on_refresh_success(result):
+    """
+    New data is in place: drop every cached response and load the new warm-start file.
+    The new file's refreshed_at is the new data version; without one, the next request
+    looks it up.
+    """
+    response_cache.bump_version()
+    if result["refresh_id"] is None:
+        warm_snapshot["data"] = None
+    else:
+        load_warm_start(after_refresh=result["refresh_id"])
+    snapshot = warm_snapshot["data"]
+    if snapshot is not None:
+        last_seen_data_version.update(updated_at=snapshot["refreshed_at"], checked_at=time.monotonic())
+    else:
+        last_seen_data_version["checked_at"] = None
+
+refresh_jobs = RefreshJobRunner(run_pipeline, on_success=on_refresh_success, timeout_seconds=REFRESH_TIMEOUT_SECONDS)
+
+@app.post("/refresh-data", status_code=202)
 async def refresh_data():
     """
     Trigger data pipeline refresh.
-    This endpoint runs the data ingestion script to update BigQuery with latest FPL data.
+    Starts the data ingestion pipeline in the background and returns its job at once;
+    poll /refresh-data/{job_id} for progress. While a refresh is queued or running,
+    further calls return that job instead of starting another one. A job that timed out
+    and has not yet unwound is reported stuck (409) until its thread exits.
     Designed to be called by Cloud Scheduler for automated daily updates.
     """
-    import subprocess
-    from pathlib import Path
-    
-    # Get the data_pipeline directory
-    # In Docker: data_pipeline is copied to backend directory
-    # In local dev: data_pipeline is in parent directory
-    backend_dir = Path(__file__).resolve().parent
-    pipeline_dir = backend_dir / "data_pipeline"
-    
-    # Fallback to parent directory for local development
-    if not pipeline_dir.exists():
-        pipeline_dir = backend_dir.parent / "data_pipeline"
-    
-    pipeline_script = pipeline_dir / "ingest.py"
-    
+    pipeline_script = PIPELINE_DIR / "ingest.py"
     if not pipeline_script.exists():
         raise HTTPException(
             status_code=500,
             detail=f"Data pipeline script not found at {pipeline_script}"
         )
-    
-    try:
-        # Run the data pipeline script
-        result = subprocess.run(
-            ["python", str(pipeline_script)],
-            cwd=str(pipeline_dir),
-            capture_output=True,
-            text=True,
-            timeout=600  # 10 minute timeout
-        )
-        
-        if result.returncode == 0:
-            return {
-                "status": "success",
-                "message": "Data refreshed successfully",
-                "output": result.stdout[-500:] if result.stdout else ""  # Last 500 chars
-            }
-        else:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Pipeline failed: {result.stderr[-500:]}"
-            )
-    except subprocess.TimeoutExpired:
-        raise HTTPException(
-            status_code=504,
-            detail="Data pipeline timed out after 10 minutes"
-        )
-    except Exception as e:
+    job, created = refresh_jobs.submit()
+    if job["status"] == "stuck":
         raise HTTPException(
-            status_code=500,
-            detail=f"Error running pipeline: {str(e)}"
+            status_code=409,
+            detail=f"Refresh job {job['job_id']} timed out and is still stopping; retry once it has failed"
         )
+    return {
+        **job,
+        "deduplicated": not created,
+        "status_url": f"/refresh-data/{job['job_id']}",
+    }
+
+@app.get("/refresh-data/latest")
+def get_latest_refresh():
+    """Get the most recent refresh job."""
+    job = refresh_jobs.latest()
+    if job is None:
+        raise HTTPException(status_code=404, detail="No refresh has run in this process")
+    return job
+
+@app.get("/refresh-data/{job_id}")
+def get_refresh_status(job_id: str):
+    """Get a refresh job's status, per-stage timings and result."""
+    job = refresh_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown refresh job: {job_id}")
+    return job
+
+startup_profile.mark("app setup")
 
 # ============================================================================
 # Run with: uvicorn main:app --reload
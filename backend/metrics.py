@@ -0,0 +1,168 @@
+"""
+Request, query and serialization metrics for the API, in Prometheus text format.
+
+- Request latency and response size per route, recorded by the metrics middleware.
+- Query time per endpoint and engine, plus BigQuery job statistics (bytes
+  processed and billed, slot time, warehouse cache hits), recorded where each job runs.
+- Serialization time per format and encoding, recorded by serialization.rows_response.
+
+The phases of one request ("query", "serialize") are also tracked in a context
+variable, so the middleware can send them as a Server-Timing header.
+"""
+import threading
+import contextvars
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Counter:
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._series = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                    cumulative += count
+                    labels = _format_labels(self.labels + ("le",), key + (bound,))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labels, key)
+                lines.append(f"{self.name}_sum{labels} {series[-1]}")
+                lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+REGISTRY = []
+
+REQUEST_DURATION = Histogram(
+    "fpl_api_request_duration_seconds", "Time to answer a request, including 304s.",
+    ("method", "route", "status"),
+)
+RESPONSE_SIZE = Histogram(
+    "fpl_api_response_size_bytes", "Response body size as sent (after compression).",
+    ("route",), SIZE_BUCKETS,
+)
+QUERY_DURATION = Histogram(
+    "fpl_api_query_duration_seconds", "Time to run one query job on the storage engine.",
+    ("endpoint", "engine"),
+)
+QUERY_ERRORS = Counter("fpl_api_query_errors_total", "Query jobs that failed.", ("endpoint", "engine"))
+QUERY_BYTES_PROCESSED = Counter("fpl_api_query_bytes_processed_total", "Bytes processed by BigQuery jobs.", ("endpoint",))
+QUERY_BYTES_BILLED = Counter("fpl_api_query_bytes_billed_total", "Bytes billed for BigQuery jobs.", ("endpoint",))
+QUERY_SLOT_MS = Counter("fpl_api_query_slot_milliseconds_total", "Slot time consumed by BigQuery jobs.", ("endpoint",))
+QUERY_WAREHOUSE_CACHE_HITS = Counter(
+    "fpl_api_query_warehouse_cache_hits_total", "BigQuery jobs answered from BigQuery's own result cache.", ("endpoint",),
+)
+SERIALIZATION_DURATION = Histogram(
+    "fpl_api_serialization_seconds", "Time to encode and compress a response body.",
+    ("format", "encoding"),
+)
+
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+def start_request_timings():
+    """Starts tracking phases for the current request; returns the {phase: (start, end)} dict."""
+    timings = {}
+    _request_timings.set(timings)
+    return timings
+
+
+def record_request_phase(phase, started, finished):
+    """
+    Widens phase's span in the current request to cover started..finished (perf_counter
+    values), so concurrent queries of one request (/dashboard) overlap instead of adding up.
+    """
+    timings = _request_timings.get()
+    if timings is not None:
+        span = timings.get(phase)
+        timings[phase] = (started, finished) if span is None else (min(span[0], started), max(span[1], finished))
+
+
+def server_timing_header(timings):
+    return ", ".join(f"{phase};dur={(end - start) * 1000:.1f}" for phase, (start, end) in timings.items())
+
+
+def observe_query(endpoint, engine, seconds, stats=None, failed=False):
+    """Records one query job; stats are the engine's job statistics (BigQuery only)."""
+    QUERY_DURATION.observe(seconds, endpoint=endpoint, engine=engine)
+    if failed:
+        QUERY_ERRORS.inc(endpoint=endpoint, engine=engine)
+    stats = stats or {}
+    if stats.get("bytes_processed") is not None:
+        QUERY_BYTES_PROCESSED.inc(stats["bytes_processed"], endpoint=endpoint)
+    if stats.get("bytes_billed") is not None:
+        QUERY_BYTES_BILLED.inc(stats["bytes_billed"], endpoint=endpoint)
+    if stats.get("slot_ms") is not None:
+        QUERY_SLOT_MS.inc(stats["slot_ms"], endpoint=endpoint)
+    if stats.get("cache_hit"):
+        QUERY_WAREHOUSE_CACHE_HITS.inc(endpoint=endpoint)
+
+
+def render(counters=None):
+    """
+    Every registered metric in Prometheus text format. counters ({name: (help, value)})
+    adds counters kept elsewhere, e.g. the response cache's hit and miss totals.
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    for name, (documentation, value) in (counters or {}).items():
+        lines.extend([f"# HELP {name} {documentation}", f"# TYPE {name} counter", f"{name} {value}"])
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,57 @@
+"""
+Non-blocking execution of blocking BigQuery calls for the async endpoints.
+
+- Queries run on a bounded thread pool, so the event loop never waits on BigQuery
+  and at most max_workers jobs are outstanding per process.
+- Each endpoint has its own semaphore, so one slow chart cannot take every slot.
+- Identical in-flight queries are coalesced (single-flight): the first caller
+  starts the job and everyone arriving before it finishes awaits the same result.
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+
+class QueryRunner:
+    def __init__(self, max_workers=8, per_endpoint_limit=4):
+        self.per_endpoint_limit = per_endpoint_limit
+        self.executed = 0
+        self.coalesced = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bigquery")
+        self._limits = {}
+        self._in_flight = {}
+
+    async def run(self, endpoint, key, fn, *args):
+        """
+        Runs fn(*args) in the pool under endpoint's concurrency limit, sharing the
+        result with every concurrent caller that passes the same key.
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._run_limited(endpoint, fn, *args))
+            self._in_flight[key] = task
+            task.add_done_callback(functools.partial(self._forget, key))
+        else:
+            self.coalesced += 1
+        # shield: a disconnecting caller must not cancel the job other callers wait on
+        return await asyncio.shield(task)
+
+    async def _run_limited(self, endpoint, fn, *args):
+        limit = self._limits.get(endpoint)
+        if limit is None:
+            limit = self._limits[endpoint] = asyncio.Semaphore(self.per_endpoint_limit)
+        async with limit:
+            self.executed += 1
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(fn, *args))
+
+    def _forget(self, key, task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+    def stats(self):
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+        }
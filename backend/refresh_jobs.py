@@ -0,0 +1,151 @@
+"""
+Background runner for /refresh-data.
+
+The pipeline runs in this process on a single worker thread, so a trigger returns
+a job ID at once and read traffic keeps being served while it runs. Only one job
+runs at a time in a process: a trigger arriving while a job is queued or running
+gets that job back instead of starting a second pipeline. Each job records its
+state, the time spent in every pipeline stage and its result; the last max_history
+jobs are kept for the status endpoint.
+
+A job still running after timeout_seconds is marked "stuck" by a watchdog, and the
+pipeline is cancelled at its next stage boundary: on_stage raises JobTimedOut. A
+thread cannot be killed, so until it has unwound the worker stays taken and
+triggers get the stuck job back rather than a second pipeline running next to it.
+Once the thread exits the job is failed and whatever it returned is discarded.
+
+Deduplication is per process, so the API runs a single worker per instance
+(see the Dockerfile). With several instances, two triggers landing on different
+ones can still run two refreshes at once.
+"""
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+
+class JobTimedOut(Exception):
+    """Raised by on_stage once the job has run past timeout_seconds."""
+
+
+class RefreshJobRunner:
+    def __init__(self, run_pipeline, on_success=None, max_history=20, timeout_seconds=None):
+        """
+        run_pipeline(on_stage) runs the pipeline, calling on_stage(name) as each stage
+        starts, and returns a JSON-compatible result; on_success(result) runs after it.
+        timeout_seconds (None: no limit) is how long a job may run before it is cancelled.
+        """
+        self.max_history = max_history
+        self.timeout_seconds = timeout_seconds
+        self._run_pipeline = run_pipeline
+        self._on_success = on_success
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="refresh")
+        self._jobs = OrderedDict()
+        self._active = None
+        self._lock = threading.Lock()
+
+    def submit(self):
+        """
+        Returns (job, created): the new job, or the one already queued, running or stuck
+        (timed out, its thread not yet exited).
+        """
+        with self._lock:
+            if self._active is not None:
+                return self._snapshot(self._active), False
+            job = {
+                "job_id": uuid.uuid4().hex,
+                "status": "queued",
+                "stage": None,
+                "stages": [],
+                "submitted_at": datetime.now(timezone.utc).isoformat(),
+                "started_at": None,
+                "finished_at": None,
+                "duration_seconds": None,
+                "result": None,
+                "error": None,
+            }
+            self._jobs[job["job_id"]] = job
+            while len(self._jobs) > self.max_history:
+                self._jobs.popitem(last=False)
+            self._active = job
+            snapshot = self._snapshot(job)
+        self._executor.submit(self._run, job)
+        return snapshot, True
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return self._snapshot(job) if job is not None else None
+
+    def latest(self):
+        with self._lock:
+            return self._snapshot(next(reversed(self._jobs.values()))) if self._jobs else None
+
+    def _snapshot(self, job):
+        return {**job, "stages": [dict(stage) for stage in job["stages"]]}
+
+    def _run(self, job):
+        started = time.perf_counter()
+        stage_started = [started]
+
+        def close_stage():
+            if job["stages"] and job["stages"][-1]["seconds"] is None:
+                job["stages"][-1]["seconds"] = round(time.perf_counter() - stage_started[0], 3)
+
+        def on_stage(name):
+            with self._lock:
+                if job["status"] == "stuck":
+                    raise JobTimedOut(job["error"])
+                close_stage()
+                stage_started[0] = time.perf_counter()
+                job["stage"] = name
+                job["stages"].append({"name": name, "seconds": None})
+
+        def finish(status, result, error):
+            """
+            Records the outcome; a stuck job is failed with its timeout error whatever
+            it returned. Call with the lock held.
+            """
+            if job["status"] == "stuck":
+                status, result, error = "failed", None, job["error"]
+            close_stage()
+            job["status"] = status
+            job["stage"] = None
+            job["result"] = result
+            job["error"] = error
+            job["finished_at"] = datetime.now(timezone.utc).isoformat()
+            job["duration_seconds"] = round(time.perf_counter() - started, 3)
+            self._active = None
+
+        def time_out():
+            with self._lock:
+                if job["status"] != "running":
+                    return
+                # Stays active: the thread still holds the worker until it unwinds
+                job["status"] = "stuck"
+                job["error"] = f"Timed out after {self.timeout_seconds}s"
+            print(f"Refresh job {job['job_id']} timed out after {self.timeout_seconds}s; cancelling at its next stage.")
+
+        with self._lock:
+            job["status"] = "running"
+            job["started_at"] = datetime.now(timezone.utc).isoformat()
+        watchdog = None
+        if self.timeout_seconds:
+            watchdog = threading.Timer(self.timeout_seconds, time_out)
+            watchdog.daemon = True
+            watchdog.start()
+        try:
+            result = self._run_pipeline(on_stage)
+            if self._on_success is not None and job["status"] == "running":
+                self._on_success(result)
+            status, error = "succeeded", None
+        except Exception as e:
+            print(f"Refresh job {job['job_id']} failed: {e}")
+            result, status, error = None, "failed", str(e)
+        finally:
+            if watchdog is not None:
+                watchdog.cancel()
+        with self._lock:
+            finish(status, result, error)
@@ -0,0 +1,58 @@
+"""
+In-process response cache for the API.
+
+Entries are keyed by the data version plus whatever identifies a response
+(query text and parameter values). Bumping the version after /refresh-data
+drops every entry at once; the TTL bounds staleness in workers and instances
+that did not serve the refresh themselves.
+"""
+import time
+import threading
+from collections import OrderedDict
+
+
+class ResponseCache:
+    def __init__(self, max_entries=256, ttl_seconds=300):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns (True, value) for a fresh entry, else (False, None)."""
+        with self._lock:
+            entry = self._entries.get((self.version, key))
+            if entry is not None and time.monotonic() - entry[0] < self.ttl_seconds:
+                self._entries.move_to_end((self.version, key))
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[(self.version, key)]
+            self.misses += 1
+            return False, None
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[(self.version, key)] = (time.monotonic(), value)
+            self._entries.move_to_end((self.version, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def bump_version(self):
+        """Invalidates everything cached so far; call when the underlying data changes."""
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+        return self.version
+
+    def stats(self):
+        with self._lock:
+            return {
+                "version": self.version,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
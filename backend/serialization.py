@@ -0,0 +1,182 @@
+"""
+Response encoding for the read endpoints.
+
+Rows coming from the league snapshot are precomputed and trusted, so endpoints
+return a ready Response built here instead of letting FastAPI validate every row
+through the Pydantic response_model and re-encode it with jsonable_encoder.
+
+- JSON is encoded with orjson when it is installed (falls back to json). Query
+  results arrive as pyarrow Tables and are encoded column by column with Arrow
+  compute kernels: each column becomes an array of JSON values, and the rows are
+  joined from those arrays, so no per-row dict or value objects are built.
+- Clients sending Accept: application/vnd.apache.arrow.stream (or ?format=arrow)
+  get an Arrow IPC stream of the rows instead, written from the Table's buffers.
+- Bodies over COMPRESS_MIN_BYTES are compressed with brotli (when installed) or
+  gzip, whichever the client accepts first in that order.
+"""
+import io
+import sys
+import gzip
+import json
+import time
+import importlib.util
+
+from fastapi import Request, Response
+
+import metrics
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# pyarrow is only imported for the first Arrow response, keeping it off the cold-start path
+HAS_ARROW = importlib.util.find_spec("pyarrow") is not None
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+COMPRESS_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def is_table(content):
+    """True for a pyarrow Table; pyarrow is loaded whenever one exists."""
+    return "pyarrow" in sys.modules and isinstance(content, sys.modules["pyarrow"].Table)
+
+
+def dumps(content):
+    if orjson is not None:
+        return orjson.dumps(content, default=str)
+    return json.dumps(content, default=str, separators=(",", ":")).encode()
+
+
+JSON_STRING_ESCAPES = (("\\", "\\\\"), ('"', '\\"'), ("\n", "\\n"), ("\r", "\\r"), ("\t", "\\t"), ("\b", "\\b"), ("\f", "\\f"))
+
+
+def json_values(column):
+    """
+    JSON text of every value of an Arrow column, as a string array (nulls become null).
+    Strings, integers, booleans and floats are converted by compute kernels; other
+    types (timestamps, nested values) and strings with rare control characters fall
+    back to encoding each value.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    value_type = column.type
+    if pa.types.is_dictionary(value_type):
+        value_type = value_type.value_type
+        column = pc.cast(column, value_type)
+    if pa.types.is_string(value_type) or pa.types.is_large_string(value_type):
+        text = column
+        for old, new in JSON_STRING_ESCAPES:
+            text = pc.replace_substring(text, old, new)
+        if not pc.any(pc.match_substring_regex(text, r"[\x00-\x1f]")).as_py():
+            return pc.fill_null(pc.binary_join_element_wise('"', text, '"', ""), "null")
+    elif pa.types.is_integer(value_type) or pa.types.is_boolean(value_type) or pa.types.is_null(value_type):
+        return pc.fill_null(pc.cast(column, pa.string()), "null")
+    elif pa.types.is_floating(value_type):
+        # NaN and infinity are not JSON numbers; like orjson, write them as null
+        finite = pc.if_else(pc.is_finite(column), column, None)
+        return pc.fill_null(pc.cast(finite, pa.string()), "null")
+    return pa.array([dumps(value).decode() for value in column.to_pylist()], pa.string())
+
+
+def encode_json_table(table):
+    """Encodes a pyarrow Table as a JSON array of row objects, column by column."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if table.num_rows == 0 or table.num_columns == 0:
+        return dumps([{}] * table.num_rows)
+    parts = []
+    for i, name in enumerate(table.column_names):
+        parts.append(("{" if i == 0 else ",") + dumps(name).decode() + ":")
+        parts.append(json_values(table.column(i)))
+    parts.append("}")
+    rows = pc.binary_join_element_wise(*parts, "")
+    if isinstance(rows, pa.ChunkedArray):
+        rows = rows.combine_chunks()
+    # One list holding every row object, joined into a single string by one kernel
+    joined = pc.binary_join(pa.ListArray.from_arrays(pa.array([0, len(rows)], pa.int32()), rows), ",")
+    return b"[" + joined[0].as_buffer().to_pybytes() + b"]"
+
+
+def encode_json(content):
+    """JSON for content; pyarrow Tables (at the top level or as dict values) are encoded column-wise."""
+    if is_table(content):
+        return encode_json_table(content)
+    if isinstance(content, dict) and any(is_table(value) for value in content.values()):
+        members = (
+            dumps(key) + b":" + (encode_json_table(value) if is_table(value) else dumps(value))
+            for key, value in content.items()
+        )
+        return b"{" + b",".join(members) + b"}"
+    return dumps(content)
+
+
+def wants_arrow(request: Request):
+    return (
+        HAS_ARROW
+        and (request.query_params.get("format") == "arrow" or ARROW_MEDIA_TYPE in request.headers.get("accept", ""))
+    )
+
+
+def choose_encoding(request: Request):
+    """Content-Encoding this server will use for request: 'br', 'gzip' or None."""
+    accepted = {
+        part.split(";")[0].strip().lower()
+        for part in request.headers.get("accept-encoding", "").split(",")
+    }
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def encode_arrow(rows):
+    import pyarrow as pa
+    import pyarrow.ipc
+
+    table = rows if is_table(rows) else pa.Table.from_pylist(rows)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def rows_response(request: Request, content):
+    """
+    Encodes a list of rows or a pyarrow Table (or, for JSON only, any JSON-compatible
+    value, which may hold Tables as dict values) for request: Arrow IPC or JSON,
+    compressed when the client accepts it and the body is large enough.
+    """
+    started = time.perf_counter()
+    if (isinstance(content, list) or is_table(content)) and wants_arrow(request):
+        body, media_type = encode_arrow(content), ARROW_MEDIA_TYPE
+    else:
+        body, media_type = encode_json(content), "application/json"
+
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    encoding = choose_encoding(request) if len(body) >= COMPRESS_MIN_BYTES else None
+    if encoding == "br":
+        body = brotli.compress(body, quality=BROTLI_QUALITY)
+    elif encoding == "gzip":
+        body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+
+    finished = time.perf_counter()
+    metrics.SERIALIZATION_DURATION.observe(
+        finished - started,
+        format="arrow" if media_type == ARROW_MEDIA_TYPE else "json",
+        encoding=encoding or "identity",
+    )
+    metrics.record_request_phase("serialize", started, finished)
+    return Response(content=body, media_type=media_type, headers=headers)
@@ -0,0 +1,179 @@
+"""
+Query engines behind the API, selected with STORAGE_BACKEND.
+
+- BigQueryEngine ("bigquery", the default) runs queries against BQ_DATASET_ID.
+- DuckDBEngine ("local") queries the Parquet tables written by
+  `STORAGE_BACKEND=local python ingest.py` in-process, with no GCP account or
+  network round trip. Its in-memory database holds every table plus the views of
+  create_views.sql, translated from BigQuery SQL, and is reloaded from the files
+  whenever an ingest run has replaced one of them.
+
+Both take standard SQL with @name parameters (passed as a {name: value} dict) and
+table names from engine.table(), and return (results as a pyarrow Table, job statistics);
+only BigQuery jobs have statistics (bytes processed and billed, slot time, cache hit).
+Results are fetched as Arrow record batches and never become per-row Python objects.
+BigQuery reads results of at least BQ_STORAGE_READ_MIN_ROWS rows through the
+Storage Read API when google-cloud-bigquery-storage is installed.
+Neither engine imports its driver or connects until the first query or warm_up(),
+so importing this module costs nothing on a cold start.
+"""
+import os
+import re
+import threading
+from pathlib import Path
+
+# Tables ingest.py writes; DuckDBEngine loads each from its Parquet file
+LOCAL_TABLES = (
+    "dim_elements", "dim_teams", "dim_element_types", "dim_entries",
+    "fact_draft_picks", "fact_gameweek_live", "fact_entry_weekly", "meta_gameweek_watermark",
+)
+
+QUALIFIED_NAME_PATTERN = re.compile(r"`\{project_id\}\.\{dataset_id\}\.(\w+)`")
+PARAMETER_PATTERN = re.compile(r"@(\w+)")
+BIGQUERY_TYPES = {bool: "BOOL", int: "INT64", float: "FLOAT64", str: "STRING"}
+# Smaller results are read from the query's first REST page, which is already fetched
+BQ_STORAGE_READ_MIN_ROWS = int(os.getenv('BQ_STORAGE_READ_MIN_ROWS', '5000'))
+
+
+def translate_views(sql):
+    """create_views.sql for DuckDB: `{project_id}.{dataset_id}.name` becomes plain name."""
+    return QUALIFIED_NAME_PATTERN.sub(r"\1", sql)
+
+
+class BigQueryEngine:
+    name = "bigquery"
+
+    def __init__(self, project_id, dataset_id):
+        self.project_id = project_id
+        self.dataset_id = dataset_id
+        self._bigquery = None
+        self._client = None
+        self._read_client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        """
+        Built on first use, once, even with concurrent callers: importing
+        google-cloud-bigquery and resolving credentials take seconds on a cold start.
+        """
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from google.cloud import bigquery
+
+                    self._bigquery = bigquery
+                    self._client = bigquery.Client(project=self.project_id)
+        return self._client
+
+    @property
+    def read_client(self):
+        """
+        Storage Read API client sharing the query client's credentials, built on first
+        use; False when google-cloud-bigquery-storage is not installed.
+        """
+        if self._read_client is None:
+            client = self.client
+            with self._lock:
+                if self._read_client is None:
+                    try:
+                        from google.cloud import bigquery_storage
+                    except ImportError:
+                        self._read_client = False
+                    else:
+                        self._read_client = bigquery_storage.BigQueryReadClient(credentials=client._credentials)
+        return self._read_client
+
+    def warm_up(self):
+        self.client
+
+    def table(self, table_name):
+        return f"`{self.project_id}.{self.dataset_id}.{table_name}`"
+
+    def query(self, sql, params=None):
+        client = self.client
+        bigquery = self._bigquery
+        job_config = bigquery.QueryJobConfig(query_parameters=[
+            bigquery.ScalarQueryParameter(name, BIGQUERY_TYPES[type(value)], value)
+            for name, value in (params or {}).items()
+        ])
+        job = client.query(sql, job_config=job_config)
+        result = job.result()
+        large = (result.total_rows or 0) >= BQ_STORAGE_READ_MIN_ROWS
+        table = result.to_arrow(
+            bqstorage_client=(self.read_client or None) if large else None,
+            create_bqstorage_client=False,
+        )
+        stats = {
+            "bytes_processed": job.total_bytes_processed,
+            "bytes_billed": job.total_bytes_billed,
+            "slot_ms": job.slot_millis,
+            "cache_hit": job.cache_hit,
+        }
+        return table, stats
+
+
+class DuckDBEngine:
+    name = "local"
+
+    def __init__(self, data_dir, views_sql_path):
+        self.data_dir = Path(data_dir)
+        self.views_sql_path = Path(views_sql_path)
+        self._connection = None
+        self._loaded_signature = None
+        self._lock = threading.Lock()
+
+    def table(self, table_name):
+        return table_name
+
+    def _table_paths(self):
+        return {table_name: self.data_dir / f"{table_name}.parquet" for table_name in LOCAL_TABLES}
+
+    def _signature(self):
+        """Modification times of the table files; ingest replaces a file on every write."""
+        try:
+            return tuple(path.stat().st_mtime_ns for path in self._table_paths().values())
+        except FileNotFoundError as e:
+            raise FileNotFoundError(f"{e.filename} not found; run STORAGE_BACKEND=local python ingest.py first") from None
+
+    def _connect(self):
+        """In-memory database with every table loaded from its file and the views on top."""
+        import duckdb
+
+        connection = duckdb.connect(":memory:")
+        for table_name, path in self._table_paths().items():
+            escaped = str(path).replace("'", "''")
+            connection.execute(f"CREATE TABLE {table_name} AS SELECT * FROM read_parquet('{escaped}')")
+        connection.execute(translate_views(self.views_sql_path.read_text()))
+        return connection
+
+    def _current_connection(self):
+        """The loaded database, (re)loaded first if a table file changed. Call with the lock held."""
+        signature = self._signature()
+        if self._connection is None or signature != self._loaded_signature:
+            # Queries already running keep their cursor on the previous database
+            self._connection = self._connect()
+            self._loaded_signature = signature
+        return self._connection
+
+    def warm_up(self):
+        with self._lock:
+            self._current_connection()
+
+    def query(self, sql, params=None):
+        import pyarrow as pa
+
+        with self._lock:
+            # A cursor is a separate connection to the same database, safe to use from this thread
+            cursor = self._current_connection().cursor()
+        try:
+            cursor.execute(PARAMETER_PATTERN.sub(r"$\1", sql), params or {})
+            # Fetched through Arrow: timestamps come back as zoneinfo-aware datetimes without pytz
+            table = cursor.fetch_record_batch().read_all()
+        finally:
+            cursor.close()
+        for i, field in enumerate(table.schema):
+            # SUM over integers is HUGEINT in DuckDB, exported as decimal(38, 0); BigQuery returns INT64
+            if pa.types.is_decimal(field.type) and field.type.scale == 0:
+                table = table.set_column(i, field.name, table.column(i).cast(pa.int64()))
+        return table, {}
@@ -0,0 +1,92 @@
+import threading
+import time
+
+from refresh_jobs import RefreshJobRunner
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out waiting"
+        time.sleep(0.01)
+
+
+def test_triggers_while_running_get_the_same_job():
+    release = threading.Event()
+    succeeded = []
+
+    def run_pipeline(on_stage):
+        on_stage("static")
+        release.wait()
+        return {"refresh_id": "r1"}
+
+    runner = RefreshJobRunner(run_pipeline, on_success=succeeded.append)
+    job, created = runner.submit()
+    again, created_again = runner.submit()
+    assert created and not created_again
+    assert again["job_id"] == job["job_id"]
+
+    release.set()
+    wait_for(lambda: runner.get(job["job_id"])["status"] == "succeeded")
+    finished = runner.get(job["job_id"])
+    assert finished["result"] == {"refresh_id": "r1"}
+    assert [stage["name"] for stage in finished["stages"]] == ["static"]
+    assert succeeded == [{"refresh_id": "r1"}]
+
+    # Finished: the next trigger starts a new job
+    _, created = runner.submit()
+    assert created
+
+
+def test_failed_pipeline_records_the_error():
+    def run_pipeline(on_stage):
+        raise RuntimeError("API down")
+
+    runner = RefreshJobRunner(run_pipeline)
+    job, _ = runner.submit()
+    wait_for(lambda: runner.get(job["job_id"])["status"] == "failed")
+    assert runner.get(job["job_id"])["error"] == "API down"
+
+
+def test_timed_out_job_is_stuck_until_its_thread_exits():
+    release = threading.Event()
+    stages_reached = []
+    succeeded = []
+
+    def run_pipeline(on_stage):
+        on_stage("weekly")
+        release.wait()
+        stages_reached.append("load")
+        on_stage("load")
+        stages_reached.append("after load")
+        return {"refresh_id": "late"}
+
+    runner = RefreshJobRunner(run_pipeline, on_success=succeeded.append, timeout_seconds=0.05)
+    job, _ = runner.submit()
+    wait_for(lambda: runner.get(job["job_id"])["status"] == "stuck")
+
+    # No second pipeline while the first thread is still running
+    again, created = runner.submit()
+    assert not created and again["job_id"] == job["job_id"] and again["status"] == "stuck"
+
+    # Cancelled at its next stage; its result is discarded
+    release.set()
+    wait_for(lambda: runner.get(job["job_id"])["status"] == "failed")
+    assert stages_reached == ["load"]
+    assert runner.get(job["job_id"])["error"] == "Timed out after 0.05s"
+    assert runner.get(job["job_id"])["result"] is None
+    assert succeeded == []
+
+    _, created = runner.submit()
+    assert created
+
+
+def test_history_is_capped():
+    runner = RefreshJobRunner(lambda on_stage: None, max_history=2)
+    job_ids = []
+    for _ in range(3):
+        job, _ = runner.submit()
+        job_ids.append(job["job_id"])
+        wait_for(lambda: runner.get(job["job_id"])["status"] == "succeeded")
+    assert runner.get(job_ids[0]) is None
+    assert runner.latest()["job_id"] == job_ids[2]
@@ -0,0 +1,54 @@
+import json
+from datetime import datetime, timezone
+
+import pyarrow as pa
+import pytest
+
+from serialization import dumps, encode_json, encode_json_table
+
+
+def assert_matches_row_encoding(table):
+    encoded = encode_json_table(table)
+    assert json.loads(encoded) == json.loads(dumps(table.to_pylist()))
+    return encoded
+
+
+def test_scalar_columns():
+    table = pa.table({
+        "entry_id": pa.array([1, None, 3], pa.int32()),
+        "points": pa.array([1.5, float("nan"), float("inf")]),
+        "is_captain": [True, False, None],
+        "status": pa.array(["a", "i", "a"]).dictionary_encode(),
+    })
+    encoded = encode_json_table(table)
+    # NaN and infinity become null, as orjson writes them
+    assert json.loads(encoded) == [
+        {"entry_id": 1, "points": 1.5, "is_captain": True, "status": "a"},
+        {"entry_id": None, "points": None, "is_captain": False, "status": "i"},
+        {"entry_id": 3, "points": None, "is_captain": None, "status": "a"},
+    ]
+
+
+@pytest.mark.parametrize("value", ['quote " here', "back\\slash", "tab\tnew\nline", "bell\x07", "émoji 🐷", "", None])
+def test_strings_are_escaped(value):
+    encoded = assert_matches_row_encoding(pa.table({"name": [value, "plain"]}))
+    assert json.loads(encoded)[0]["name"] == value
+
+
+def test_fallback_types_match_row_encoding():
+    assert_matches_row_encoding(pa.table({
+        "refreshed_at": pa.array([datetime(2026, 1, 1, tzinfo=timezone.utc), None]),
+        "picks": [[1, 2], []],
+        "chart": [{"gw": 1, "points": 3}, None],
+    }))
+
+
+def test_chunked_and_empty_tables():
+    chunked = pa.concat_tables([pa.table({"x": [1, 2]}), pa.table({"x": [3]})])
+    assert assert_matches_row_encoding(chunked) == b'[{"x":1},{"x":2},{"x":3}]'
+    assert encode_json_table(pa.table({"x": pa.array([], pa.int64())})) == b"[]"
+
+
+def test_encode_json_embeds_tables_in_dicts():
+    content = {"league_id": 4193, "rows": pa.table({"x": [1]})}
+    assert json.loads(encode_json(content)) == {"league_id": 4193, "rows": [{"x": 1}]}
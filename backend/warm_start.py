@@ -0,0 +1,42 @@
+"""
+Warm-start snapshot for API cold starts.
+
+After each refresh, data_pipeline/materialize.py exports the new league_snapshot
+rows to WARM_START_PATH as an Arrow IPC file: one row per league holding every
+chart, tagged with its refresh_id and refreshed_at. The file can be bundled into
+the image or kept on a mounted volume. At startup the API memory-maps it and serves
+charts from it straight away, while a background check compares refreshed_at with
+the warehouse's data version and drops the snapshot if it is stale.
+"""
+from pathlib import Path
+
+
+def load(path):
+    """
+    Reads a warm-start file into {"refresh_id", "refreshed_at", "path", "leagues"},
+    where leagues maps league_id to its one-row league_snapshot table, the same one
+    get_snapshot would read. Rows stay in the memory-mapped file; nothing is decoded.
+    Returns None if there is no file.
+    """
+    if not path or not Path(path).exists():
+        return None
+    import pyarrow as pa
+    import pyarrow.ipc
+
+    with pa.memory_map(str(path)) as source:
+        table = pa.ipc.open_file(source).read_all()
+    if table.num_rows == 0:
+        return None
+    columns = [name for name in table.column_names if name != "league_id"]
+    leagues = {
+        league_id: table.slice(i, 1).select(columns)
+        for i, league_id in enumerate(table.column("league_id").to_pylist())
+    }
+    refreshed_at = table.column("refreshed_at").to_pylist()
+    newest = refreshed_at.index(max(refreshed_at))
+    return {
+        "refresh_id": table.column("refresh_id")[newest].as_py(),
+        "refreshed_at": refreshed_at[newest],
+        "path": str(path),
+        "leagues": leagues,
+    }
@@ -0,0 +1,145 @@
+"""
+Offline ingestion throughput benchmark.
+
+Starts fake_fpl_api.py in-process for each league size, runs `ingest.py --dry-run`
+against it in a fresh interpreter, and reports end-to-end time, request count and
+peak RSS of the ingest process:
+
+    python benchmark.py
+    python benchmark.py --sizes 6x400x10,10x800x38,50x800x38 --latency-ms 40 --ingest-args="--stream"
+
+Sizes are MANAGERSxPLAYERSxGAMEWEEKS. The response cache is disabled unless
+--with-cache is given, so every run measures cold network fetches.
+
+With the token bucket on, ingest never goes faster than FPL_RATE_LIMIT_RPS
+(default 20 req/s): that, not the concurrency limit, caps its throughput, and
+every size would just measure the bucket. The benchmark therefore disables it
+by default (--rate-limit-rps 0); pass a rate to measure ingest as it runs against
+the real API. The rate in effect is printed with the results.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import urllib.request
+from pathlib import Path
+
+from fake_fpl_api import FakeApiConfig, LEAGUE_ID, start_fake_api
+from http_client import RATE_BURST
+
+PIPELINE_DIR = Path(__file__).resolve().parent
+DEFAULT_SIZES = "6x400x10,10x800x38,30x800x38"
+
+
+def parse_size(size):
+    managers, players, gameweeks = (int(part) for part in size.lower().split("x"))
+    return managers, players, gameweeks
+
+
+def run_ingest(base_url, ingest_args, with_cache, rate_limit_rps=0.0, rate_burst=RATE_BURST):
+    """Runs ingest.py --dry-run in a child process. Returns (seconds, peak_rss_mib, returncode, tail)."""
+    env = dict(os.environ, FPL_API_BASE_URL=base_url, FPL_LEAGUE_ID=str(LEAGUE_ID))
+    if not with_cache:
+        env["FPL_CACHE"] = "0"
+    env["FPL_RATE_LIMIT_RPS"] = str(rate_limit_rps)
+    env["FPL_RATE_BURST"] = str(rate_burst)
+
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, str(PIPELINE_DIR / "ingest.py"), "--dry-run", *ingest_args],
+        cwd=str(PIPELINE_DIR),
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+    output = proc.stdout.read()
+    # wait4 gives this child's own rusage, unlike RUSAGE_CHILDREN which keeps the max over all runs
+    _, status, rusage = os.wait4(proc.pid, 0)
+    elapsed = time.perf_counter() - started
+    proc.returncode = os.waitstatus_to_exitcode(status)
+
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak_rss_mib = rusage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return elapsed, peak_rss_mib, proc.returncode, output[-2000:]
+
+
+def fetch_request_count(base_url):
+    stats_url = base_url.rsplit("/api", 1)[0] + "/__stats"
+    with urllib.request.urlopen(stats_url) as r:
+        return json.load(r)["total"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ingest.py against a local fake FPL API.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated MANAGERSxPLAYERSxGAMEWEEKS.")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per size; the fastest is reported.")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--ingest-args", default="", help="Extra arguments for ingest.py, e.g. \"--stream\".")
+    parser.add_argument("--rate-limit-rps", type=float, default=0.0,
+                        help="FPL_RATE_LIMIT_RPS for the ingest process (default 0: token bucket disabled).")
+    parser.add_argument("--rate-burst", type=int, default=RATE_BURST,
+                        help=f"FPL_RATE_BURST for the ingest process (default {RATE_BURST}).")
+    parser.add_argument("--with-cache", action="store_true", help="Keep the on-disk response cache enabled.")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes.split(","):
+        managers, players, gameweeks = parse_size(size)
+        server = start_fake_api(FakeApiConfig(
+            managers=managers,
+            players=players,
+            gameweeks=gameweeks,
+            latency_ms=args.latency_ms,
+            latency_jitter_ms=args.latency_jitter_ms,
+            error_rate=args.error_rate,
+        ))
+        try:
+            runs = []
+            for _ in range(args.repeat):
+                server.reset_stats()
+                seconds, rss, returncode, tail = run_ingest(
+                    server.base_url, args.ingest_args.split(), args.with_cache, args.rate_limit_rps, args.rate_burst
+                )
+                if returncode != 0:
+                    print(f"ingest.py failed for {size} (exit {returncode}):\n{tail}", file=sys.stderr)
+                    sys.exit(1)
+                runs.append((seconds, rss, fetch_request_count(server.base_url)))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        seconds, rss, requests_made = min(runs)
+        results.append({
+            "size": size,
+            "managers": managers,
+            "players": players,
+            "gameweeks": gameweeks,
+            "seconds": round(seconds, 3),
+            "requests": requests_made,
+            "requests_per_second": round(requests_made / seconds, 1),
+            "peak_rss_mib": round(rss, 1),
+            "rate_limit_rps": args.rate_limit_rps,
+            "rate_burst": args.rate_burst,
+        })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    if args.rate_limit_rps > 0:
+        print(f"Token bucket: {args.rate_limit_rps:g} req/s (burst {args.rate_burst}); req/s cannot exceed it.")
+    else:
+        print("Token bucket: disabled (throughput limited by FETCH_CONCURRENCY and the adaptive limiter).")
+    print(f"{'size':>14} {'seconds':>9} {'requests':>9} {'req/s':>8} {'peak RSS MiB':>13}")
+    for r in results:
+        print(f"{r['size']:>14} {r['seconds']:>9.2f} {r['requests']:>9} {r['requests_per_second']:>8.1f} {r['peak_rss_mib']:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,27 @@
+"""
+Deploys the views in create_views.sql.
+
+    python create_views.py            # deploy changed views
+    python create_views.py --force    # redeploy every view
+    python create_views.py --dry-run  # only validate the changed views
+
+Statements are split with a tokenizer that respects quotes and comments, and a
+dependency graph is built from the objects each statement references. A view is
+deployed when its definition hash differs from the one recorded in
+meta_view_deploys (or when something it depends on is redeployed). Independent
+views run concurrently, level by level; when one fails its dependents are
+skipped and every view already replaced in this run is restored to its previous
+definition, so a failed deploy never leaves a half-updated view tree.
+"""
 from google.cloud import bigquery
+from google.api_core.exceptions import NotFound
 import os
+import re
+import sys
+import hashlib
+import argparse
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -10,22 +31,223 @@ GCP_PROJECT_ID = os.getenv('GCP_PROJECT_ID')
 BQ_DATASET_ID = os.getenv('BQ_DATASET_ID')
 CREDENTIALS_PATH = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
 
-if not GCP_PROJECT_ID or not BQ_DATASET_ID:
-    print("Error: GCP_PROJECT_ID or BQ_DATASET_ID not set in .env")
-    exit(1)
+DEPLOY_TABLE = "meta_view_deploys"
+DDL_CONCURRENCY = int(os.getenv('DDL_CONCURRENCY', '8'))
+
+TARGET_PATTERN = re.compile(
+    r'^\s*CREATE\s+(?:OR\s+REPLACE\s+)?(?:MATERIALIZED\s+)?(?:VIEW|TABLE)\s+(?:IF\s+NOT\s+EXISTS\s+)?`?([\w.-]+)`?',
+    re.IGNORECASE,
+)
+REFERENCE_PATTERN = re.compile(r'`([\w-]+\.[\w-]+\.[\w-]+)`')
+
+
+def get_client():
+    if not GCP_PROJECT_ID or not BQ_DATASET_ID:
+        print("Error: GCP_PROJECT_ID or BQ_DATASET_ID not set in .env")
+        sys.exit(1)
+
+    # Resolve credentials path to absolute
+    if CREDENTIALS_PATH:
+        credentials_path = CREDENTIALS_PATH
+        if not Path(credentials_path).is_absolute():
+            project_root = Path(__file__).resolve().parent.parent
+            credentials_path = str(project_root / credentials_path)
+        os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = credentials_path
+    return bigquery.Client(project=GCP_PROJECT_ID)
+
+
+def split_statements(sql):
+    """
+    Splits a SQL script on top-level semicolons. Semicolons inside quoted strings,
+    backticked identifiers and comments are kept. Comment-only chunks are dropped.
+    """
+    statements = []
+    current = []
+    has_code = False
+    i, n = 0, len(sql)
+    while i < n:
+        ch = sql[i]
+        if ch == '-' and sql.startswith('--', i) or ch == '#':
+            end = sql.find('\n', i)
+            end = n if end == -1 else end
+            current.append(sql[i:end])
+            i = end
+            continue
+        if sql.startswith('/*', i):
+            end = sql.find('*/', i + 2)
+            end = n if end == -1 else end + 2
+            current.append(sql[i:end])
+            i = end
+            continue
+        if ch in ("'", '"', '`'):
+            j = i + 1
+            while j < n and sql[j] != ch:
+                j += 2 if sql[j] == '\\' else 1
+            current.append(sql[i:j + 1])
+            has_code = True
+            i = j + 1
+            continue
+        if ch == ';':
+            if has_code:
+                statements.append(''.join(current).strip())
+            current, has_code = [], False
+            i += 1
+            continue
+        current.append(ch)
+        has_code = has_code or not ch.isspace()
+        i += 1
+    if has_code:
+        statements.append(''.join(current).strip())
+    return statements
+
+
+def build_plan(statements):
+    """
+    Returns {object_id: {'sql', 'hash', 'depends_on'}} for every CREATE statement,
+    where depends_on lists the other objects in the script that it references.
+    """
+    plan = {}
+    for statement in statements:
+        match = TARGET_PATTERN.match(re.sub(r'^(\s*--[^\n]*\n)*', '', statement))
+        if not match:
+            raise ValueError(f"Not a CREATE statement:\n{statement[:200]}")
+        plan[match.group(1)] = {
+            'sql': statement,
+            'hash': hashlib.sha256(statement.encode()).hexdigest(),
+            'references': set(REFERENCE_PATTERN.findall(statement)) - {match.group(1)},
+        }
+    for node in plan.values():
+        node['depends_on'] = sorted(node.pop('references') & plan.keys())
+    return plan
+
+
+def dependency_levels(plan):
+    """Groups objects into levels where each level only depends on earlier ones."""
+    remaining = {name: set(node['depends_on']) for name, node in plan.items()}
+    levels = []
+    while remaining:
+        ready = sorted(name for name, deps in remaining.items() if not deps)
+        if not ready:
+            raise ValueError(f"Dependency cycle between: {', '.join(sorted(remaining))}")
+        levels.append(ready)
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return levels
+
+
+def get_deployed_hashes(client):
+    table_id = f"{GCP_PROJECT_ID}.{BQ_DATASET_ID}.{DEPLOY_TABLE}"
+    try:
+        rows = client.query(f"SELECT object_id, definition_sha256 FROM `{table_id}`").result()
+    except NotFound:
+        return {}
+    return {row['object_id']: row['definition_sha256'] for row in rows}
+
+
+def record_deployed_hashes(client, plan):
+    table_id = f"{GCP_PROJECT_ID}.{BQ_DATASET_ID}.{DEPLOY_TABLE}"
+    rows = [{'object_id': name, 'definition_sha256': node['hash']} for name, node in plan.items()]
+    job_config = bigquery.LoadJobConfig(
+        write_disposition="WRITE_TRUNCATE",
+        schema=[
+            bigquery.SchemaField("object_id", "STRING"),
+            bigquery.SchemaField("definition_sha256", "STRING"),
+        ],
+    )
+    client.load_table_from_json(rows, table_id, job_config=job_config).result()
+
 
-# Resolve credentials path to absolute
-if CREDENTIALS_PATH and not Path(CREDENTIALS_PATH).is_absolute():
-    project_root = Path(__file__).resolve().parent.parent
-    CREDENTIALS_PATH = str(project_root / CREDENTIALS_PATH)
+def select_changed(plan, deployed_hashes, force=False):
+    """Objects whose definition changed, plus everything downstream of them."""
+    changed = {name for name, node in plan.items() if force or deployed_hashes.get(name) != node['hash']}
+    grew = True
+    while grew:
+        downstream = {name for name, node in plan.items() if changed.intersection(node['depends_on'])}
+        grew = not downstream <= changed
+        changed |= downstream
+    return changed
 
-# Initialize BigQuery Client
-os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = CREDENTIALS_PATH
-client = bigquery.Client(project=GCP_PROJECT_ID)
 
-def create_views():
+def get_previous_definition(client, object_id):
+    """Returns (existed, view_query) for object_id; view_query is None for non-views."""
+    try:
+        return True, client.get_table(object_id).view_query
+    except NotFound:
+        return False, None
+
+
+def restore(client, object_id, previous):
+    existed, previous_sql = previous
+    if not existed:
+        client.query(f"DROP VIEW IF EXISTS `{object_id}`").result()
+    elif previous_sql is not None:
+        client.query(f"CREATE OR REPLACE VIEW `{object_id}` AS {previous_sql}").result()
+    else:
+        print(f"{object_id} was not a view before this deploy; leaving it as is.")
+        return
+    print(f"Restored {object_id}.")
+
+
+def validate(client, plan, changed):
+    """
+    Dry-runs every changed statement whose dependencies are not changing too (the
+    rest can only be checked against the new upstream once it is deployed).
+    Returns {object_id: error}.
+    """
+    dry_run_config = bigquery.QueryJobConfig(dry_run=True, use_query_cache=False)
+    candidates = [name for name in changed if not changed.intersection(plan[name]['depends_on'])]
+    errors = {}
+    with ThreadPoolExecutor(max_workers=DDL_CONCURRENCY) as pool:
+        futures = {name: pool.submit(client.query, plan[name]['sql'], job_config=dry_run_config) for name in candidates}
+        for name, future in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                errors[name] = e
+    return errors
+
+
+def deploy(client, plan, changed):
+    """Runs the changed statements level by level. Returns {object_id: error}; rolls back on failure."""
+    previous = {name: get_previous_definition(client, name) for name in changed}
+    deployed = []
+    errors = {}
+    for level in dependency_levels(plan):
+        to_run = [name for name in level if name in changed]
+        if not to_run:
+            continue
+        with ThreadPoolExecutor(max_workers=DDL_CONCURRENCY) as pool:
+            futures = {name: pool.submit(lambda sql: client.query(sql).result(), plan[name]['sql']) for name in to_run}
+            for name, future in futures.items():
+                try:
+                    future.result()
+                    deployed.append(name)
+                    print(f"Deployed {name}.")
+                except Exception as e:
+                    errors[name] = e
+                    print(f"Error deploying {name}: {e}")
+        if errors:
+            skipped = [name for name in changed if name not in deployed and name not in errors]
+            if skipped:
+                print(f"Skipped dependents: {', '.join(sorted(skipped))}")
+            break
+
+    if errors:
+        # Undo in reverse order so dependents are restored before what they read from
+        for name in reversed(deployed):
+            try:
+                restore(client, name, previous[name])
+            except Exception as e:
+                print(f"Could not restore {name}: {e}")
+    return errors
+
+
+def create_views(force=False, dry_run=False):
+    client = get_client()
     print(f"Creating views in project {GCP_PROJECT_ID}, dataset {BQ_DATASET_ID}...")
-    
+
     # Read SQL file
     sql_file_path = os.path.join(os.path.dirname(__file__), 'create_views.sql')
     with open(sql_file_path, 'r') as f:
@@ -37,21 +259,33 @@ def create_views():
         dataset_id=BQ_DATASET_ID
     )
 
-    # Split by semicolon to execute each statement
-    # Note: simple split might break if semicolons are in strings/comments, 
-    # but for our specific SQL file it should remain safe if we're careful.
-    statements = formatted_sql.split(';')
-    
-    for statement in statements:
-        if statement.strip():
-            print(f"Executing statement...")
-            try:
-                job = client.query(statement)
-                job.result()  # Wait for job to complete
-                print("Statement executed successfully.")
-            except Exception as e:
-                print(f"Error executing statement: {e}")
-                print(f"Statement:\n{statement[:100]}...")
+    plan = build_plan(split_statements(formatted_sql))
+    changed = select_changed(plan, get_deployed_hashes(client), force=force)
+    if not changed:
+        print("All views are up to date.")
+        return
+    print(f"{len(changed)} of {len(plan)} views to deploy: {', '.join(sorted(changed))}")
+
+    errors = validate(client, plan, changed)
+    if errors:
+        for name, e in errors.items():
+            print(f"Validation failed for {name}: {e}")
+        print("Nothing was deployed.")
+        sys.exit(1)
+    if dry_run:
+        print("Validation passed (dry run, nothing deployed).")
+        return
+
+    errors = deploy(client, plan, changed)
+    if errors:
+        print(f"Deploy failed for {', '.join(errors)}; views were restored to their previous definitions.")
+        sys.exit(1)
+    record_deployed_hashes(client, plan)
+    print("Views deployed successfully.")
 
 if __name__ == "__main__":
-    create_views()
+    parser = argparse.ArgumentParser(description="Deploy the BigQuery views in create_views.sql.")
+    parser.add_argument("--force", action="store_true", help="Redeploy every view, even if unchanged.")
+    parser.add_argument("--dry-run", action="store_true", help="Validate the changed views without deploying them.")
+    args = parser.parse_args()
+    create_views(force=args.force, dry_run=args.dry_run)
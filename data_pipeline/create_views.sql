@@ -32,6 +32,7 @@ JOIN `{project_id}.{dataset_id}.dim_element_types` et ON p.element_type = et.id;
 -- Legacy: draft_match_data
 CREATE OR REPLACE VIEW `{project_id}.{dataset_id}.dim_manager_gameweek` AS
 SELECT
+    ew.league_id,
     ew.gameweek,
     ew.entry_id,
     e.entry_name as manager_name,
@@ -48,26 +49,29 @@ FROM `{project_id}.{dataset_id}.fact_entry_weekly` ew
 JOIN `{project_id}.{dataset_id}.dim_player_match_stats` pms 
     ON ew.element = pms.element_id AND ew.gameweek = pms.gameweek
 JOIN `{project_id}.{dataset_id}.dim_entries` e
-    ON ew.entry_id = e.entry_id;
+    ON ew.entry_id = e.entry_id AND ew.league_id = e.league_id;
 
 -- 3. agg_league_standings
 -- Legacy: aggregate_df
 CREATE OR REPLACE VIEW `{project_id}.{dataset_id}.agg_league_standings` AS
 SELECT
+    league_id,
     entry_id,
     manager_name,
     SUM(total_points) as total_points,
-    RANK() OVER (ORDER BY SUM(total_points) DESC) as rank
+    RANK() OVER (PARTITION BY league_id ORDER BY SUM(total_points) DESC) as rank
 FROM `{project_id}.{dataset_id}.dim_manager_gameweek`
 WHERE lineup = 'On Field'
-GROUP BY 1, 2;
+GROUP BY 1, 2, 3;
 
 -- 4. agg_manager_momentum
 -- Legacy: aggregate_momentum_df
--- Assuming current_gw is max in data
+-- Assuming current_gw is max in data. The MAX() subquery is not a constant, so this view
+-- scans every gameweek; the league snapshot (materialize.sql) reads only the last four.
 CREATE OR REPLACE VIEW `{project_id}.{dataset_id}.agg_manager_momentum` AS
 WITH max_gw AS (SELECT MAX(gameweek) as gw FROM `{project_id}.{dataset_id}.fact_gameweek_live`)
 SELECT
+    league_id,
     entry_id,
     manager_name,
     SUM(total_points) as total_points_last_4_gw
@@ -75,47 +79,51 @@ FROM `{project_id}.{dataset_id}.dim_manager_gameweek`
 CROSS JOIN max_gw
 WHERE lineup = 'On Field'
   AND gameweek > (max_gw.gw - 4)
-GROUP BY 1, 2;
+GROUP BY 1, 2, 3;
 
 -- 5. agg_player_contribution
 -- Legacy: aggregate_player_df
 CREATE OR REPLACE VIEW `{project_id}.{dataset_id}.agg_player_contribution` AS
 SELECT
+    league_id,
     entry_id,
     manager_name,
     web_name,
     SUM(total_points) as total_points
 FROM `{project_id}.{dataset_id}.dim_manager_gameweek`
 WHERE lineup = 'On Field'
-GROUP BY 1, 2, 3;
+GROUP BY 1, 2, 3, 4;
 
 -- 6. agg_bench_points
 -- Legacy: bp_df
 CREATE OR REPLACE VIEW `{project_id}.{dataset_id}.agg_bench_points` AS
 SELECT
+    league_id,
     entry_id,
     manager_name,
     SUM(total_points) as bench_points
 FROM `{project_id}.{dataset_id}.dim_manager_gameweek`
 WHERE lineup = 'Sub'
-GROUP BY 1, 2;
+GROUP BY 1, 2, 3;
 
 -- 7. agg_manager_consistency
 -- Legacy: weekly_team_trend
 CREATE OR REPLACE VIEW `{project_id}.{dataset_id}.agg_manager_consistency` AS
 SELECT
+    league_id,
     gameweek,
     entry_id,
     manager_name,
     SUM(total_points) as weekly_points
 FROM `{project_id}.{dataset_id}.dim_manager_gameweek`
 WHERE lineup = 'On Field'
-GROUP BY 1, 2, 3;
+GROUP BY 1, 2, 3, 4;
 
 -- 8. agg_draft_picks_analysis
 -- Legacy: pick_analysis_df
 CREATE OR REPLACE VIEW `{project_id}.{dataset_id}.agg_draft_picks_analysis` AS
 SELECT
+    mgr.league_id,
     mgr.manager_name,
     CASE
         WHEN dp.round IS NOT NULL AND dp.round <= 3 THEN 1
@@ -138,18 +146,20 @@ FROM `{project_id}.{dataset_id}.dim_manager_gameweek` mgr
 LEFT JOIN `{project_id}.{dataset_id}.fact_draft_picks` dp
     ON mgr.element_id = dp.element
     AND mgr.entry_id = dp.entry
+    AND mgr.league_id = dp.league_id
 WHERE mgr.lineup = 'On Field'
-GROUP BY 1, 2, 3, 4, 5, 7;
+GROUP BY 1, 2, 3, 4, 5, 6, 8;
 
 -- 9. agg_top_transfers
 -- Legacy: fig_top_transfers logic
 CREATE OR REPLACE VIEW `{project_id}.{dataset_id}.agg_top_transfers` AS
+-- Top 20 per league
 SELECT
+    league_id,
     player_name,
     manager_name,
     SUM(total_points_contributed) as total_points
 FROM `{project_id}.{dataset_id}.agg_draft_picks_analysis`
 WHERE pick_bucket = 'Transfer'
-GROUP BY 1, 2
-ORDER BY total_points DESC
-LIMIT 20;
+GROUP BY 1, 2, 3
+QUALIFY ROW_NUMBER() OVER (PARTITION BY league_id ORDER BY SUM(total_points_contributed) DESC) <= 20;
@@ -0,0 +1,382 @@
+"""
+Local stand-in for the FPL Draft API, so ingest.py can run and be benchmarked offline.
+
+Serves the endpoints the pipeline uses under /api with synthetic, deterministic
+payloads (or recorded ones from --fixtures), scaled by managers, players and
+gameweeks, with optional injected latency and 5xx errors:
+
+    python fake_fpl_api.py --port 8765 --managers 10 --players 800 --gameweeks 38
+    FPL_API_BASE_URL=http://127.0.0.1:8765/api python ingest.py --dry-run
+
+Recorded fixtures mirror the URL path, e.g. <fixtures>/bootstrap-static.json or
+<fixtures>/event/12/live.json, and take precedence over synthetic data.
+GET /__stats returns request counts per endpoint; POST /__stats resets them.
+"""
+import re
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LEAGUE_ID = 4193
+ENTRY_ID_STRIDE = 1000
+SQUAD_SIZE = 15
+N_TEAMS = 20
+
+INT_STATS = (
+    "minutes", "goals_scored", "assists", "clean_sheets", "goals_conceded", "own_goals",
+    "penalties_saved", "penalties_missed", "yellow_cards", "red_cards", "saves", "bonus",
+    "bps", "starts", "total_points",
+)
+DECIMAL_STATS = (
+    "influence", "creativity", "threat", "ict_index", "expected_goals", "expected_assists",
+    "expected_goal_involvements", "expected_goals_conceded",
+)
+ELEMENT_TYPES = (
+    (1, "Goalkeeper", "GKP"),
+    (2, "Defender", "DEF"),
+    (3, "Midfielder", "MID"),
+    (4, "Forward", "FWD"),
+)
+
+
+@dataclass
+class FakeApiConfig:
+    managers: int = 10
+    players: int = 800
+    gameweeks: int = 38
+    latency_ms: float = 0.0
+    latency_jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    seed: int = 0
+    fixtures_dir: Path = None
+
+
+class FakeFplData:
+    """Builds deterministic synthetic payloads for one league of the configured size."""
+
+    def __init__(self, config, league_id=LEAGUE_ID):
+        self.config = config
+        self.league_id = league_id
+        # Entry IDs encode their league so /entry/{id}/event/{gw} can be routed back to it
+        self.entry_ids = [league_id * ENTRY_ID_STRIDE + i for i in range(1, config.managers + 1)]
+        self.element_ids = list(range(1, config.players + 1))
+        self.squads = self._draft_squads()
+
+    def _rng(self, *key):
+        return random.Random(f"{self.config.seed}:{':'.join(map(str, key))}")
+
+    def _draft_squads(self):
+        """Snake draft of SQUAD_SIZE rounds; returns {entry_id: [(element, round, pick)]}."""
+        available = list(self.element_ids)
+        self._rng("draft", self.league_id).shuffle(available)
+        squads = {entry_id: [] for entry_id in self.entry_ids}
+        pick = 0
+        for round_no in range(1, SQUAD_SIZE + 1):
+            order = self.entry_ids if round_no % 2 else list(reversed(self.entry_ids))
+            for entry_id in order:
+                if not available:
+                    return squads
+                pick += 1
+                squads[entry_id].append((available.pop(), round_no, pick))
+        return squads
+
+    def bootstrap_static(self):
+        rng = self._rng("bootstrap")
+        elements = [
+            {
+                "id": element_id,
+                "web_name": f"Player{element_id}",
+                "first_name": "Fake",
+                "second_name": f"Player{element_id}",
+                "team": (element_id - 1) % N_TEAMS + 1,
+                "element_type": (element_id - 1) % len(ELEMENT_TYPES) + 1,
+                "status": "a",
+                "news": "",
+                "total_points": rng.randint(0, 200),
+                "minutes": rng.randint(0, 3420),
+                "starts": rng.randint(0, 38),
+                "expected_goal_involvements": f"{rng.random() * 20:.2f}",
+            }
+            for element_id in self.element_ids
+        ]
+        teams = [
+            {"id": team_id, "code": team_id, "name": f"Team {team_id}", "short_name": f"T{team_id:02d}"}
+            for team_id in range(1, N_TEAMS + 1)
+        ]
+        element_types = [
+            {"id": type_id, "singular_name": name, "singular_name_short": short, "plural_name": f"{name}s"}
+            for type_id, name, short in ELEMENT_TYPES
+        ]
+        current = self.config.gameweeks
+        events = {
+            "current": current,
+            "next": current + 1 if current < 38 else None,
+            "data": [
+                {
+                    "id": gw,
+                    "name": f"Gameweek {gw}",
+                    "finished": gw < current,
+                    "data_checked": gw < current,
+                }
+                for gw in range(1, 39)
+            ],
+        }
+        return {"elements": elements, "teams": teams, "element_types": element_types, "events": events}
+
+    def gameweek_live(self, gameweek):
+        rng = self._rng("live", gameweek)
+        elements = {}
+        for element_id in self.element_ids:
+            stats = {name: rng.randint(0, 3) for name in INT_STATS}
+            stats["minutes"] = rng.choice((0, 0, 25, 60, 90, 90))
+            stats["bps"] = rng.randint(-5, 60)
+            stats["total_points"] = rng.randint(-2, 15)
+            stats.update({name: f"{rng.random() * 10:.1f}" for name in DECIMAL_STATS})
+            stats["in_dreamteam"] = rng.random() < 0.01
+            elements[str(element_id)] = {"stats": stats, "explain": []}
+        return {"elements": elements}
+
+    def league_details(self, league_id):
+        return {
+            "league": {"id": league_id, "name": f"Fake League {league_id}"},
+            "league_entries": [
+                {
+                    "id": i,
+                    "entry_id": entry_id,
+                    "entry_name": f"Team {entry_id}",
+                    "player_first_name": "Manager",
+                    "player_last_name": str(i),
+                    "short_name": f"M{i}",
+                }
+                for i, entry_id in enumerate(self.entry_ids, start=1)
+            ],
+            "standings": [],
+        }
+
+    def draft_choices(self, league_id):
+        choices = [
+            {
+                "element": element_id,
+                "entry": entry_id,
+                "entry_name": f"Team {entry_id}",
+                "league": league_id,
+                "round": round_no,
+                "pick": pick,
+                "index": pick - 1,
+            }
+            for entry_id, squad in self.squads.items()
+            for element_id, round_no, pick in squad
+        ]
+        choices.sort(key=lambda c: c["pick"])
+        return {"choices": choices}
+
+    def entry_event(self, entry_id, gameweek):
+        squad = list(self.squads.get(entry_id, []))
+        self._rng("lineup", entry_id, gameweek).shuffle(squad)
+        picks = [
+            {
+                "element": element_id,
+                "position": position,
+                "is_captain": position == 1,
+                "is_vice_captain": position == 2,
+                "multiplier": 1 if position < 12 else 0,
+            }
+            for position, (element_id, _, _) in enumerate(squad, start=1)
+        ]
+        return {"picks": picks, "subs": [], "entry_history": {"event": gameweek}}
+
+
+ROUTES = (
+    ("bootstrap-static", re.compile(r"^/api/bootstrap-static/?$")),
+    ("event-live", re.compile(r"^/api/event/(\d+)/live/?$")),
+    ("league-details", re.compile(r"^/api/league/(\d+)/details/?$")),
+    ("draft-choices", re.compile(r"^/api/draft/(\d+)/choices/?$")),
+    ("entry-event", re.compile(r"^/api/entry/(\d+)/event/(\d+)/?$")),
+)
+
+
+class FakeFplApiServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 makes concurrent clients wait out a SYN retransmit
+    request_queue_size = 128
+
+    def __init__(self, address, config):
+        super().__init__(address, FakeFplApiHandler)
+        self.config = config
+        self.data = FakeFplData(config)
+        self.leagues = {LEAGUE_ID: self.data}
+        self.error_rng = random.Random(config.seed)
+        self.stats_lock = threading.Lock()
+        self.request_counts = Counter()
+        self._body_cache = {}
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+    def count(self, endpoint):
+        with self.stats_lock:
+            self.request_counts[endpoint] += 1
+
+    def reset_stats(self):
+        with self.stats_lock:
+            self.request_counts.clear()
+
+    def body_for(self, endpoint, path, args):
+        """Returns the JSON body for a route, preferring recorded fixtures. None means 404."""
+        if path in self._body_cache:
+            return self._body_cache[path]
+
+        body = None
+        if self.config.fixtures_dir:
+            fixture = Path(self.config.fixtures_dir) / f"{path[len('/api/'):].rstrip('/')}.json"
+            if fixture.exists():
+                body = fixture.read_bytes()
+        if body is None:
+            payload = self._synthetic(endpoint, args)
+            body = json.dumps(payload).encode() if payload is not None else None
+
+        self._body_cache[path] = body
+        return body
+
+    def league(self, league_id):
+        """Any league ID is served, each with its own managers and draft."""
+        if league_id not in self.leagues:
+            self.leagues[league_id] = FakeFplData(self.config, league_id)
+        return self.leagues[league_id]
+
+    def _synthetic(self, endpoint, args):
+        data = self.data
+        if endpoint == "bootstrap-static":
+            return data.bootstrap_static()
+        if endpoint == "event-live":
+            gameweek = int(args[0])
+            return data.gameweek_live(gameweek) if 1 <= gameweek <= self.config.gameweeks else None
+        if endpoint == "league-details":
+            return self.league(int(args[0])).league_details(int(args[0]))
+        if endpoint == "draft-choices":
+            return self.league(int(args[0])).draft_choices(int(args[0]))
+        if endpoint == "entry-event":
+            entry_id, gameweek = int(args[0]), int(args[1])
+            data = self.leagues.get(entry_id // ENTRY_ID_STRIDE)
+            if data is None or entry_id not in data.squads or not 1 <= gameweek <= self.config.gameweeks:
+                return None
+            return data.entry_event(entry_id, gameweek)
+        return None
+
+
+class FakeFplApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; Nagle would hold the body for a delayed ACK
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/__stats":
+            with self.server.stats_lock:
+                counts = dict(self.server.request_counts)
+            self._send(200, json.dumps({"total": sum(counts.values()), "by_endpoint": counts}).encode())
+            return
+
+        for endpoint, pattern in ROUTES:
+            match = pattern.match(path)
+            if match:
+                break
+        else:
+            self.server.count("unknown")
+            self._send(404, b'{"detail": "Not found."}')
+            return
+
+        self.server.count(endpoint)
+        config = self.server.config
+        delay_ms = config.latency_ms + random.uniform(0, config.latency_jitter_ms)
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+        if config.error_rate and self.server.error_rng.random() < config.error_rate:
+            self._send(503, b'{"detail": "Injected error."}')
+            return
+
+        body = self.server.body_for(endpoint, path, match.groups())
+        if body is None:
+            self._send(404, b'{"detail": "Not found."}')
+            return
+
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        if self.headers.get("If-None-Match") == etag:
+            self._send(304, b"", etag=etag)
+            return
+        self._send(200, body, etag=etag)
+
+    def do_POST(self):
+        if self.path == "/__stats":
+            self.server.reset_stats()
+            self._send(200, b'{"reset": true}')
+        else:
+            self._send(404, b'{"detail": "Not found."}')
+
+    def _send(self, status, body, etag=None):
+        self.send_response(status)
+        if status != 304:
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fake_api(config=None, host="127.0.0.1", port=0):
+    """Starts the fake API on a background thread and returns the server (see .base_url)."""
+    server = FakeFplApiServer((host, port), config or FakeApiConfig())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local fake FPL Draft API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--managers", type=int, default=10)
+    parser.add_argument("--players", type=int, default=800)
+    parser.add_argument("--gameweeks", type=int, default=38, help="Current gameweek (earlier ones are finished).")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fixtures", type=Path, default=None, help="Directory of recorded JSON payloads.")
+    args = parser.parse_args()
+
+    config = FakeApiConfig(
+        managers=args.managers,
+        players=args.players,
+        gameweeks=args.gameweeks,
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        error_rate=args.error_rate,
+        seed=args.seed,
+        fixtures_dir=args.fixtures,
+    )
+    server = FakeFplApiServer((args.host, args.port), config)
+    print(f"Fake FPL Draft API serving league {LEAGUE_ID} at {server.base_url} "
+          f"({config.managers} managers, {config.players} players, {config.gameweeks} gameweeks)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
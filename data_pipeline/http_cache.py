@@ -0,0 +1,204 @@
+"""
+Content-addressed on-disk cache for FPL API responses.
+
+Shared by the ingestion pipeline and the legacy Streamlit app. Layout:
+    <FPL_CACHE_DIR>/index/<sha256(url)>.json   -> url, body hash, validators, stored_at
+    <FPL_CACHE_DIR>/objects/<sha256(body)>     -> raw response body
+    <FPL_CACHE_DIR>/tmp/                        -> files being written, renamed into place
+
+Identical bodies (e.g. an unchanged bootstrap-static) are stored once. An entry is
+only served forever if it was stored (or last revalidated) while its gameweek was
+already finished; one cached while the gameweek was live is revalidated once more
+after it finishes, so bonus points and late corrections are picked up. Stale entries
+are revalidated with If-None-Match / If-Modified-Since when the server sent
+validators, and the least recently used bodies are evicted past FPL_CACHE_MAX_MB.
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import tempfile
+import threading
+import requests
+from pathlib import Path
+
+CACHE_ENABLED = os.getenv('FPL_CACHE', '1') != '0'
+CACHE_DIR = Path(os.getenv('FPL_CACHE_DIR', Path.home() / '.cache' / 'fpl_draft'))
+CACHE_MAX_BYTES = int(os.getenv('FPL_CACHE_MAX_MB', '64')) * 1024 * 1024
+
+# Per-endpoint freshness. None means cache forever.
+BOOTSTRAP_TTL_SECONDS = 300
+CURRENT_GAMEWEEK_TTL_SECONDS = 60
+DEFAULT_TTL_SECONDS = 300
+
+# Endpoints whose payload is frozen once their gameweek is finished
+GAMEWEEK_URL_PATTERNS = (
+    re.compile(r'/event/(\d+)/live/?$'),
+    re.compile(r'/entry/\d+/event/(\d+)/?$'),
+)
+
+HTTP_TIMEOUT_SECONDS = 30
+
+
+def ttl_for(url, finished_gameweeks=()):
+    """Returns how long a response for url stays fresh in seconds, or None for forever."""
+    for pattern in GAMEWEEK_URL_PATTERNS:
+        match = pattern.search(url)
+        if match:
+            if int(match.group(1)) in finished_gameweeks:
+                return None
+            return CURRENT_GAMEWEEK_TTL_SECONDS
+    if url.rstrip('/').endswith('/bootstrap-static'):
+        return BOOTSTRAP_TTL_SECONDS
+    return DEFAULT_TTL_SECONDS
+
+
+def _default_send(url, headers):
+    return requests.get(url, headers=headers, timeout=HTTP_TIMEOUT_SECONDS)
+
+
+def _write_atomic(path, data, tmp_dir):
+    # Written outside objects/ so a concurrent eviction never sees (and deletes) a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class ResponseCache:
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, enabled=CACHE_ENABLED):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.index_dir = self.directory / 'index'
+        self.objects_dir = self.directory / 'objects'
+        self.tmp_dir = self.directory / 'tmp'
+        self._lock = threading.Lock()
+        self._total_bytes = None
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        if self.enabled:
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            self.objects_dir.mkdir(parents=True, exist_ok=True)
+            self.tmp_dir.mkdir(parents=True, exist_ok=True)
+
+    def fetch(self, url, ttl=DEFAULT_TTL_SECONDS, send=_default_send):
+        """
+        Returns the response body for url as bytes, or None on a non-200 response.
+        `send(url, headers)` performs the network request and returns a requests.Response.
+        """
+        if not self.enabled:
+            r = send(url, {})
+            return r.content if r.status_code == 200 else None
+
+        index_path = self.index_dir / f"{hashlib.sha256(url.encode()).hexdigest()}.json"
+        entry = self._read_entry(index_path)
+        body = self._read_object(entry['body_sha256']) if entry else None
+
+        if ttl is None:
+            fresh = entry is not None and entry.get('final', False)
+        else:
+            fresh = entry is not None and time.time() - entry['stored_at'] < ttl
+        if body is not None and fresh:
+            self.hits += 1
+            return body
+
+        headers = {}
+        if body is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        r = send(url, headers)
+        if r.status_code == 304 and body is not None:
+            self.revalidated += 1
+            entry['stored_at'] = time.time()
+            entry['final'] = ttl is None
+            _write_atomic(index_path, json.dumps(entry).encode(), self.tmp_dir)
+            return body
+        if r.status_code != 200:
+            return None
+
+        self.misses += 1
+        self._store(index_path, url, r, final=ttl is None)
+        return r.content
+
+    def _read_entry(self, index_path):
+        try:
+            return json.loads(index_path.read_bytes())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _read_object(self, body_sha256):
+        object_path = self.objects_dir / body_sha256
+        try:
+            body = object_path.read_bytes()
+            # mtime doubles as the LRU clock for eviction
+            os.utime(object_path)
+        except FileNotFoundError:
+            # Missing, or evicted since the read: a miss either way
+            return None
+        return body
+
+    def _store(self, index_path, url, response, final=False):
+        body = response.content
+        body_sha256 = hashlib.sha256(body).hexdigest()
+        object_path = self.objects_dir / body_sha256
+        try:
+            os.utime(object_path)
+            is_new_object = False
+        except FileNotFoundError:
+            # Not stored yet, or evicted just now
+            _write_atomic(object_path, body, self.tmp_dir)
+            is_new_object = True
+
+        entry = {
+            'url': url,
+            'body_sha256': body_sha256,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'stored_at': time.time(),
+            # Fetched once its payload could no longer change: never revalidated again
+            'final': final,
+        }
+        _write_atomic(index_path, json.dumps(entry).encode(), self.tmp_dir)
+
+        if is_new_object:
+            self._account(len(body))
+
+    def _account(self, added_bytes):
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(p.stat().st_size for p in self.objects_dir.iterdir())
+            else:
+                self._total_bytes += added_bytes
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drops least recently used bodies until the cache is back under 90% of max_bytes."""
+        objects = []
+        for path in self.objects_dir.iterdir():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            objects.append((stat.st_mtime, stat.st_size, path))
+        objects.sort()
+
+        target = int(self.max_bytes * 0.9)
+        total = sum(size for _, size, _ in objects)
+        for _, size, path in objects:
+            if total <= target:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+        # Index entries pointing at evicted bodies are treated as misses on next read
+        self._total_bytes = total
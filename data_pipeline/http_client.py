@@ -0,0 +1,191 @@
+"""
+Shared request layer for FPL API calls.
+
+Every request goes through one FplHttpClient, which combines:
+- a token bucket capping the request rate (FPL_RATE_LIMIT_RPS / FPL_RATE_BURST),
+- an AIMD concurrency limit: it grows slowly while responses are fast and healthy
+  and halves on 429/5xx/transport errors or shrinks when latency passes a target,
+- retries with full-jitter exponential backoff on 429/5xx and on any
+  requests.RequestException (connection, timeout, broken body), honouring Retry-After on 429,
+- per-endpoint latency, retry and error counters (see report()).
+
+Non-retryable responses (e.g. 404) are returned to the caller as-is; retryable
+failures that outlive FPL_MAX_RETRIES raise FetchError instead of being dropped.
+"""
+import os
+import re
+import time
+import random
+import threading
+import requests
+from collections import defaultdict, deque
+from requests.adapters import HTTPAdapter
+
+RATE_LIMIT_RPS = float(os.getenv('FPL_RATE_LIMIT_RPS', '20'))
+RATE_BURST = int(os.getenv('FPL_RATE_BURST', '20'))
+MAX_RETRIES = int(os.getenv('FPL_MAX_RETRIES', '5'))
+BACKOFF_BASE_SECONDS = float(os.getenv('FPL_BACKOFF_BASE_SECONDS', '0.5'))
+BACKOFF_MAX_SECONDS = float(os.getenv('FPL_BACKOFF_MAX_SECONDS', '30'))
+LATENCY_TARGET_SECONDS = float(os.getenv('FPL_LATENCY_TARGET_SECONDS', '2.0'))
+HTTP_TIMEOUT_SECONDS = 30
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class FetchError(Exception):
+    """Raised when a request still fails after every retry."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket. A rate of 0 disables limiting."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class AdaptiveConcurrencyLimiter:
+    """Additive-increase / multiplicative-decrease cap on in-flight requests."""
+
+    def __init__(self, initial, minimum=1, maximum=None, latency_target=LATENCY_TARGET_SECONDS):
+        self.minimum = minimum
+        self.maximum = maximum or initial
+        self.limit = float(min(initial, self.maximum))
+        self.latency_target = latency_target
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, ok, latency):
+        with self._cond:
+            self.in_flight -= 1
+            if not ok:
+                self.limit = max(self.minimum, self.limit / 2)
+            elif latency > self.latency_target:
+                self.limit = max(self.minimum, self.limit * 0.9)
+            else:
+                # Roughly +1 per window of `limit` healthy responses
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+class EndpointStats:
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=1000)
+
+    def percentile(self, q):
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def endpoint_for(url):
+    """Collapses IDs so /entry/123/event/5 and /entry/456/event/6 share one set of counters."""
+    path = re.sub(r'^https?://[^/]+', '', url).split('?', 1)[0]
+    return re.sub(r'/\d+', '/{id}', path)
+
+
+def backoff_delay(attempt, retry_after=None):
+    """Full-jitter exponential backoff, or the server's Retry-After when it gives one."""
+    if retry_after is not None:
+        try:
+            return min(BACKOFF_MAX_SECONDS, float(retry_after))
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+class FplHttpClient:
+    def __init__(self, max_concurrency, rate=RATE_LIMIT_RPS, burst=RATE_BURST, max_retries=MAX_RETRIES):
+        self.max_retries = max_retries
+        self.bucket = TokenBucket(rate, burst)
+        self.limiter = AdaptiveConcurrencyLimiter(max_concurrency, maximum=max_concurrency)
+        self.stats = defaultdict(EndpointStats)
+        self._stats_lock = threading.Lock()
+
+        # One keep-alive session, pooled to the concurrency ceiling
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def send(self, url, headers=None):
+        """GETs url with rate limiting and retries. Matches the `send` hook of ResponseCache.fetch."""
+        endpoint = endpoint_for(url)
+        last_failure = None
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            self.limiter.acquire()
+            started = time.monotonic()
+            response = None
+            ok = False
+            try:
+                response = self.session.get(url, headers=headers or {}, timeout=HTTP_TIMEOUT_SECONDS)
+                ok = response.status_code not in RETRYABLE_STATUS_CODES
+            except requests.RequestException as e:
+                # Any transport failure (connection, timeout, broken chunked body, ...) is retried
+                last_failure = e
+            finally:
+                # Always give the slot back, or the limiter stalls every later request
+                latency = time.monotonic() - started
+                self.limiter.release(ok, latency)
+            self._record(endpoint, latency, retried=attempt > 0, failed=not ok)
+
+            if ok:
+                if response.status_code not in (200, 304):
+                    print(f"Warning: {url} returned {response.status_code}")
+                return response
+
+            retry_after = None
+            if response is not None:
+                last_failure = f"HTTP {response.status_code}"
+                retry_after = response.headers.get('Retry-After')
+            if attempt < self.max_retries:
+                time.sleep(backoff_delay(attempt, retry_after))
+
+        raise FetchError(f"{url} failed after {self.max_retries + 1} attempts: {last_failure}")
+
+    def _record(self, endpoint, latency, retried, failed):
+        with self._stats_lock:
+            stats = self.stats[endpoint]
+            stats.requests += 1
+            stats.retries += retried
+            stats.errors += failed
+            stats.latencies.append(latency)
+
+    def report(self):
+        """Prints per-endpoint request, retry and latency counters."""
+        with self._stats_lock:
+            rows = sorted(self.stats.items())
+        if not rows:
+            return
+        print(f"\nFPL API requests (concurrency limit now {self.limiter.limit:.1f}):")
+        for endpoint, stats in rows:
+            print(f"  {endpoint}: {stats.requests} requests, {stats.retries} retries, {stats.errors} errors, "
+                  f"p50 {stats.percentile(0.5) * 1000:.0f}ms, p95 {stats.percentile(0.95) * 1000:.0f}ms")
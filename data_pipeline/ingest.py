@@ -1,15 +1,27 @@
+import io
 import os
-import requests
+import time
+import argparse
 import json
+import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
+from concurrent.futures import ThreadPoolExecutor
 from google.cloud import bigquery
+from google.api_core.exceptions import NotFound
 from dotenv import load_dotenv
 from pathlib import Path
-from datetime import datetime
 
 # Load environment variables
 load_dotenv()
 
+# Local modules read their settings from the environment at import time
+from http_cache import ResponseCache, ttl_for
+from http_client import FplHttpClient
+from table_schemas import TABLE_MANIFESTS, apply_manifest, arrow_table
+from materialize import materialize
+from local_store import LocalStore
+
 # Resolve GCP credentials path
 if os.getenv("GOOGLE_APPLICATION_CREDENTIALS"):
     service_account_path = Path(os.getenv("GOOGLE_APPLICATION_CREDENTIALS"))
@@ -22,7 +34,61 @@ if os.getenv("GOOGLE_APPLICATION_CREDENTIALS"):
 GCP_PROJECT_ID = os.getenv('GCP_PROJECT_ID')
 BQ_DATASET_ID = os.getenv('BQ_DATASET_ID', 'fpl_draft_data')
 DATASET_LOCATION = os.getenv('DATASET_LOCATION', 'EU')
-LEAGUE_ID = "4193" # Hardcoded for now based on legacy code
+LEAGUE_ID = os.getenv('FPL_LEAGUE_ID', '4193') # Defaults to the league from the legacy code
+# Point at fake_fpl_api.py (e.g. http://127.0.0.1:8765/api) to run offline
+FPL_API_BASE_URL = os.getenv('FPL_API_BASE_URL', 'https://draft.premierleague.com/api').rstrip('/')
+
+# Max number of in-flight FPL API requests when fanning out weekly fetches
+FETCH_CONCURRENCY = int(os.getenv('FETCH_CONCURRENCY', '16'))
+
+# Shared keep-alive session with rate limiting, retries and adaptive concurrency (see http_client.py)
+http_client = FplHttpClient(FETCH_CONCURRENCY)
+
+# On-disk cache of API responses (see http_cache.py). Finished gameweeks are cached
+# forever, so FINISHED_GAMEWEEKS is filled in as soon as bootstrap-static is parsed.
+response_cache = ResponseCache()
+FINISHED_GAMEWEEKS = set()
+
+# "bigquery" loads into BQ_DATASET_ID; "local" writes Parquet files under LOCAL_DATA_DIR
+# (see local_store.py) for the API's in-process DuckDB engine
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'bigquery')
+
+# Load jobs are serialized to compressed Parquet and submitted in parallel
+LOAD_CONCURRENCY = int(os.getenv('LOAD_CONCURRENCY', '8'))
+PARQUET_COMPRESSION = 'zstd'
+
+# "full" reloads every gameweek; "incremental" only fetches gameweeks not yet finalized
+INGEST_MODE = os.getenv('INGEST_MODE', 'full')
+
+# Streaming mode writes gameweeks in fixed-size chunks so memory stays flat over the season
+INGEST_STREAM = os.getenv('INGEST_STREAM', '0') == '1'
+STREAM_CHUNK_GAMEWEEKS = int(os.getenv('STREAM_CHUNK_GAMEWEEKS', '4'))
+
+# Records, per league, which gameweeks are loaded and which are finalized (finished + data checked)
+WATERMARK_TABLE = "meta_gameweek_watermark"
+
+# Leagues ingested by one run. Global payloads (bootstrap-static, /event/{gw}/live)
+# are fetched once and shared; only league endpoints and entry picks run per league.
+LEAGUE_IDS = [league_id.strip() for league_id in os.getenv('FPL_LEAGUE_IDS', LEAGUE_ID).split(',') if league_id.strip()]
+
+# Tables with a league_id column. Incremental writes only ever replace rows of the leagues being ingested.
+LEAGUE_KEYED_TABLES = ("dim_entries", "fact_draft_picks", "fact_entry_weekly", WATERMARK_TABLE)
+
+# Full rewrites of league-keyed tables are loaded here first, then swapped in (see replace_leagues)
+STAGING_SUFFIX = "__staging"
+
+# Fact tables keyed by gameweek are integer-range partitioned so a gameweek can be
+# replaced without touching the rest of the season
+GAMEWEEK_PARTITIONED_TABLES = ("fact_gameweek_live", "fact_entry_weekly", WATERMARK_TABLE)
+GAMEWEEK_PARTITIONING = bigquery.RangePartitioning(
+    field="gameweek",
+    range_=bigquery.PartitionRange(start=1, end=40, interval=1),
+)
+# Within each partition, rows are clustered on the keys views join and endpoints filter on
+TABLE_CLUSTERING = {
+    "fact_gameweek_live": ["element_id"],
+    "fact_entry_weekly": ["league_id", "entry_id", "element"],
+}
 
 def get_bigquery_client():
     try:
@@ -43,39 +109,413 @@ def ensure_dataset_exists(client, dataset_id):
         client.create_dataset(dataset)
         print(f"Dataset {dataset_id} created.")
 
-def load_dataframe_to_bigquery(client, df, table_name):
-    if df.empty:
-        print(f"Skipping {table_name}: DataFrame is empty.")
+def table_exists(client, table_id):
+    try:
+        client.get_table(table_id)
+        return True
+    except NotFound:
+        return False
+
+def ensure_table_layout(client, table_name):
+    """
+    Rewrites a table in place when its partitioning or clustering differs from
+    GAMEWEEK_PARTITIONING / TABLE_CLUSTERING, so load jobs with that spec succeed.
+    """
+    table_id = f"{client.project}.{BQ_DATASET_ID}.{table_name}"
+    try:
+        table = client.get_table(table_id)
+    except NotFound:
+        return # The first load creates it with the right spec
+    clustering = TABLE_CLUSTERING.get(table_name)
+    if table.range_partitioning is not None and table.clustering_fields == clustering:
+        return
+
+    if table_name in LEAGUE_KEYED_TABLES:
+        # league_id must exist before it can be clustered on
+        ensure_league_keyed(client, table_name)
+    cluster_by = f"CLUSTER BY {', '.join(clustering)}" if clustering else ""
+    print(f"Partitioning {table_name} on gameweek {cluster_by}...")
+    r = GAMEWEEK_PARTITIONING.range_
+    client.query(f"""
+        CREATE OR REPLACE TABLE `{table_id}`
+        PARTITION BY RANGE_BUCKET(gameweek, GENERATE_ARRAY({r.start}, {r.end}, {r.interval}))
+        {cluster_by}
+        AS SELECT * FROM `{table_id}`
+    """).result()
+
+def ensure_league_keyed(client, table_name):
+    """
+    Adds league_id to a table written before multi-league support. Existing rows all
+    came from the single hardcoded league, so they are backfilled with LEAGUE_ID.
+    """
+    table_id = f"{client.project}.{BQ_DATASET_ID}.{table_name}"
+    try:
+        table = client.get_table(table_id)
+    except NotFound:
         return
+    if any(field.name == 'league_id' for field in table.schema):
+        return
+
+    print(f"Adding league_id to {table_name} (backfilling league {LEAGUE_ID})...")
+    client.query(f"""
+        ALTER TABLE `{table_id}` ADD COLUMN IF NOT EXISTS league_id INT64;
+        UPDATE `{table_id}` SET league_id = {int(LEAGUE_ID)} WHERE league_id IS NULL;
+    """).result()
 
+def ensure_table_columns(client, table_name):
+    """
+    Rewrites a table loaded before the column manifests, once: scraped_at was a
+    DATETIME (loads now write a TIMESTAMP, which an append would reject) and columns
+    outside the manifest were kept. Tables that are only ever appended to would
+    otherwise hold those columns forever. Partitioning and clustering are preserved.
+    """
     table_id = f"{client.project}.{BQ_DATASET_ID}.{table_name}"
+    try:
+        table = client.get_table(table_id)
+    except NotFound:
+        return
+    manifest = TABLE_MANIFESTS.get(table_name)
+    keep = [f.name for f in table.schema if f.name != 'scraped_at' and (manifest is None or f.name in manifest)]
+    scraped_at = next((f for f in table.schema if f.name == 'scraped_at'), None)
+    legacy_scraped_at = scraped_at is not None and scraped_at.field_type == 'DATETIME'
+    extra_columns = len(keep) + (scraped_at is not None) < len(table.schema)
+    if not (legacy_scraped_at or extra_columns):
+        return
+
+    columns = list(keep)
+    if scraped_at is not None:
+        columns.append("TIMESTAMP(scraped_at, 'UTC') AS scraped_at" if legacy_scraped_at else "scraped_at")
+    layout = ""
+    if table.range_partitioning is not None:
+        r = table.range_partitioning.range_
+        layout += f"PARTITION BY RANGE_BUCKET({table.range_partitioning.field}, GENERATE_ARRAY({r.start}, {r.end}, {r.interval}))\n"
+    if table.clustering_fields:
+        layout += f"CLUSTER BY {', '.join(table.clustering_fields)}"
+    print(f"Migrating {table_name} to its manifest columns and a TIMESTAMP scraped_at...")
+    client.query(f"""
+        CREATE OR REPLACE TABLE `{table_id}`
+        {layout}
+        AS SELECT {', '.join(columns)} FROM `{table_id}`
+    """).result()
+
+def dataframe_to_parquet(df, table_name):
+    """
+    Serializes a frame to compressed in-memory Parquet, with the Arrow schema declared
+    for the table in table_schemas.py rather than one inferred from this frame.
+    """
+    table = arrow_table(df, table_name)
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer, compression=PARQUET_COMPRESSION)
+    buffer.seek(0)
+    return buffer
+
+def _run_load_job(client, df, table_name, write_disposition, destination=None):
+    """
+    Uploads one frame as Parquet and waits for its load job. Returns (rows, bytes, seconds).
+    With no client (dry run) the frame is still serialized but never uploaded; with a
+    LocalStore it is written to the table's Parquet file instead. A destination (e.g. a
+    staging table) receives table_name's rows in place of table_name itself, which is
+    still brought up to date so the rows can be inserted into it afterwards.
+    """
+    started = time.perf_counter()
     
-    # Add scraped_at timestamp
-    df['scraped_at'] = datetime.utcnow()
+    # Drop columns no view reads and shrink the rest to their declared dtypes
+    df = apply_manifest(df, table_name)
+    # Add scraped_at timestamp (tz-aware so Parquet maps it to TIMESTAMP, not DATETIME)
+    df['scraped_at'] = pd.Timestamp.now(tz='UTC')
+
+    if client is None:
+        n_bytes = dataframe_to_parquet(df, table_name).getbuffer().nbytes
+        return len(df), n_bytes, time.perf_counter() - started
+    if isinstance(client, LocalStore):
+        n_bytes = client.write_table(df, table_name, write_disposition)
+        return len(df), n_bytes, time.perf_counter() - started
+
+    staged = destination is not None
+    table_id = f"{client.project}.{BQ_DATASET_ID}.{destination or table_name}"
 
     job_config = bigquery.LoadJobConfig(
-        write_disposition="WRITE_TRUNCATE", # For V1, we overwrite. Later can use WRITE_APPEND with day partitioning
+        write_disposition=write_disposition,
+        source_format=bigquery.SourceFormat.PARQUET,
     )
+    if write_disposition == "WRITE_APPEND" or staged:
+        if table_name in LEAGUE_KEYED_TABLES:
+            ensure_league_keyed(client, table_name)
+        ensure_table_columns(client, table_name)
+    if table_name in GAMEWEEK_PARTITIONED_TABLES:
+        ensure_table_layout(client, table_name)
+        if not staged:
+            job_config.range_partitioning = GAMEWEEK_PARTITIONING
+            job_config.clustering_fields = TABLE_CLUSTERING.get(table_name)
 
-    print(f"Loading {len(df)} rows to {table_id}...")
-    job = client.load_table_from_dataframe(df, table_id, job_config=job_config)
+    payload = dataframe_to_parquet(df, table_name)
+    n_bytes = payload.getbuffer().nbytes
+    job = client.load_table_from_file(payload, table_id, job_config=job_config)
     job.result() # Wait for job to complete
-    print(f"Loaded {table_name} successfully.")
+    return len(df), n_bytes, time.perf_counter() - started
+
+def load_dataframes_to_bigquery(client, frames, write_disposition="WRITE_TRUNCATE", destinations=None):
+    """
+    Loads several independent tables at once: every frame in {table_name: df} is
+    serialized and submitted concurrently, then the group is awaited together so the
+    write phase lasts as long as the slowest table rather than the sum of them.
+    write_disposition is either one disposition for all tables or a {table_name: disposition} dict.
+    destinations ({table_name: table}) redirects some frames, e.g. to staging tables.
+    """
+    destinations = destinations or {}
+    pending = {}
+    for table_name, df in frames.items():
+        if df is None or df.empty:
+            print(f"Skipping {table_name}: DataFrame is empty.")
+        else:
+            pending[table_name] = df
+    if not pending:
+        return
+    if isinstance(write_disposition, dict):
+        dispositions = write_disposition
+    else:
+        dispositions = dict.fromkeys(pending, write_disposition)
+
+    print(f"Loading {', '.join(f'{t} ({dispositions[t]})' for t in pending)}...")
+    group_started = time.perf_counter()
+    errors = {}
+    with ThreadPoolExecutor(max_workers=LOAD_CONCURRENCY) as pool:
+        futures = {
+            table_name: pool.submit(_run_load_job, client, df, table_name, dispositions[table_name], destinations.get(table_name))
+            for table_name, df in pending.items()
+        }
+        for table_name, future in futures.items():
+            try:
+                n_rows, n_bytes, seconds = future.result()
+                print(f"Loaded {table_name} successfully: {n_rows} rows, {n_bytes / 1024:.1f} KiB parquet in {seconds:.2f}s.")
+            except Exception as e:
+                errors[table_name] = e
+                print(f"Failed to load {table_name}: {e}")
+    print(f"Load group finished in {time.perf_counter() - group_started:.2f}s.")
+
+    if errors:
+        raise RuntimeError(f"Load jobs failed for: {', '.join(errors)}") from next(iter(errors.values()))
+
+def load_dataframe_to_bigquery(client, df, table_name, write_disposition="WRITE_TRUNCATE"):
+    load_dataframes_to_bigquery(client, {table_name: df}, write_disposition=write_disposition)
+
+def delete_rows(client, table_name, gameweeks=None, league_ids=None, league_gameweeks=None):
+    """
+    Deletes rows of the given gameweeks and/or leagues from a table, if it exists.
+    league_gameweeks ({league_id: gameweeks}) limits each league to its own gameweeks.
+    """
+    if client is None:
+        return
+    if isinstance(client, LocalStore):
+        n_deleted = client.delete_rows(table_name, gameweeks, league_ids, league_gameweeks)
+        print(f"Cleared {n_deleted} rows from {table_name}.")
+        return
+    table_id = f"{client.project}.{BQ_DATASET_ID}.{table_name}"
+    if not table_exists(client, table_id):
+        return
+    if table_name in LEAGUE_KEYED_TABLES and (league_ids or league_gameweeks):
+        ensure_league_keyed(client, table_name)
+
+    conditions = []
+    params = []
+    if league_gameweeks:
+        gameweeks = sorted(set().union(*league_gameweeks.values()))
+        keys = [f"{league_id}:{gw}" for league_id, gws in league_gameweeks.items() for gw in gws]
+        # The plain gameweek filter keeps partition pruning; the key filter makes it exact per league
+        conditions.append("CONCAT(CAST(league_id AS STRING), ':', CAST(gameweek AS STRING)) IN UNNEST(@keys)")
+        params.append(bigquery.ArrayQueryParameter("keys", "STRING", keys))
+    if gameweeks is not None:
+        conditions.append("gameweek IN UNNEST(@gameweeks)")
+        params.append(bigquery.ArrayQueryParameter("gameweeks", "INT64", sorted(gameweeks)))
+    if league_ids is not None:
+        conditions.append("league_id IN UNNEST(@league_ids)")
+        params.append(bigquery.ArrayQueryParameter("league_ids", "INT64", sorted(league_ids)))
+
+    client.query(
+        f"DELETE FROM `{table_id}` WHERE {' AND '.join(conditions)}",
+        job_config=bigquery.QueryJobConfig(query_parameters=params),
+    ).result()
+    print(f"Cleared {table_name} where {' AND '.join(conditions)}.")
+
+def replace_gameweeks(client, df, table_name, gameweeks, league_gameweeks=None):
+    """
+    Deletes the given gameweeks from a fact table and appends their fresh rows.
+    For league-keyed tables pass league_gameweeks so only the refetched
+    (league, gameweek) pairs are replaced. Gameweeks (or pairs) with no rows in df,
+    e.g. after a 404 or an empty payload, are left as they are rather than wiped.
+    """
+    if df.empty:
+        return
+    if league_gameweeks:
+        fetched = set(zip(df['league_id'].astype(int), df['gameweek'].astype(int)))
+        league_gameweeks = {
+            league_id: [gw for gw in gws if (int(league_id), gw) in fetched]
+            for league_id, gws in league_gameweeks.items()
+        }
+        league_gameweeks = {league_id: gws for league_id, gws in league_gameweeks.items() if gws}
+        if league_gameweeks:
+            delete_rows(client, table_name, league_gameweeks=league_gameweeks)
+    else:
+        fetched = set(df['gameweek'].astype(int))
+        gameweeks = [gw for gw in gameweeks if gw in fetched]
+        if gameweeks:
+            delete_rows(client, table_name, gameweeks=gameweeks)
+    load_dataframe_to_bigquery(client, df, table_name, write_disposition="WRITE_APPEND")
+
+def replace_leagues(client, frames):
+    """
+    Loads {table_name: df} as a full rewrite: global tables are truncated, while
+    league-keyed tables only have the leagues present in their frame replaced, so
+    other leagues (and a league whose fetch returned nothing) keep their rows.
+
+    On BigQuery the league-keyed frames are loaded into staging tables, and only once
+    every load has succeeded are they swapped in with one transaction, so a failed
+    load leaves the previous rows in place. Local storage has no transactions: its
+    watermark for the replaced leagues is cleared first, so a failed run is refetched
+    in full by the next --incremental run instead of being skipped.
+    """
+    keyed = {
+        table_name: sorted(int(league_id) for league_id in df['league_id'].unique())
+        for table_name, df in frames.items()
+        if table_name in LEAGUE_KEYED_TABLES and df is not None and not df.empty
+    }
+    dispositions = {
+        table_name: "WRITE_APPEND" if table_name in LEAGUE_KEYED_TABLES else "WRITE_TRUNCATE"
+        for table_name in frames
+    }
+    if client is None or isinstance(client, LocalStore):
+        gameweek_leagues = set().union(*(keyed[t] for t in keyed if t in GAMEWEEK_PARTITIONED_TABLES))
+        if gameweek_leagues:
+            delete_rows(client, WATERMARK_TABLE, league_ids=sorted(gameweek_leagues))
+        for table_name, league_ids in keyed.items():
+            delete_rows(client, table_name, league_ids=league_ids)
+        load_dataframes_to_bigquery(client, frames, write_disposition=dispositions)
+        return
+
+    # A table that does not exist yet holds no other leagues: it is loaded directly
+    staging = {
+        table_name: f"{table_name}{STAGING_SUFFIX}"
+        for table_name in keyed
+        if table_exists(client, f"{client.project}.{BQ_DATASET_ID}.{table_name}")
+    }
+    for table_name in staging:
+        dispositions[table_name] = "WRITE_TRUNCATE"
+    try:
+        load_dataframes_to_bigquery(client, frames, write_disposition=dispositions, destinations=staging)
+        swap_in_staging(client, staging, keyed)
+    finally:
+        for staging_name in staging.values():
+            client.delete_table(f"{client.project}.{BQ_DATASET_ID}.{staging_name}", not_found_ok=True)
+
+def swap_in_staging(client, staging, league_ids):
+    """
+    Replaces each table's leagues ({table_name: league_ids}) with the rows of its
+    staging table ({table_name: staging table}) in a single transaction.
+    """
+    if not staging:
+        return
+    dataset = f"{client.project}.{BQ_DATASET_ID}"
+    statements = []
+    params = []
+    for i, (table_name, staging_name) in enumerate(staging.items()):
+        columns = ", ".join(field.name for field in client.get_table(f"{dataset}.{staging_name}").schema)
+        statements.append(f"DELETE FROM `{dataset}.{table_name}` WHERE league_id IN UNNEST(@league_ids_{i});")
+        statements.append(f"INSERT INTO `{dataset}.{table_name}` ({columns}) SELECT {columns} FROM `{dataset}.{staging_name}`;")
+        params.append(bigquery.ArrayQueryParameter(f"league_ids_{i}", "INT64", league_ids[table_name]))
+    client.query(
+        "BEGIN TRANSACTION;\n" + "\n".join(statements) + "\nCOMMIT TRANSACTION;",
+        job_config=bigquery.QueryJobConfig(query_parameters=params),
+    ).result()
+    print(f"Swapped in {', '.join(staging)} for leagues {sorted(set().union(*(league_ids[t] for t in staging)))}.")
+
+def get_finalized_gameweeks(client, league_ids):
+    """Returns {league_id: set of gameweeks} the watermark table marks as finalized."""
+    finalized = {league_id: set() for league_id in league_ids}
+    if client is None:
+        return finalized
+    if isinstance(client, LocalStore):
+        watermark = client.read_table(WATERMARK_TABLE)
+        if watermark is not None:
+            rows = watermark[watermark['finalized'] & watermark['league_id'].isin(league_ids)]
+            for league_id, gameweek in zip(rows['league_id'], rows['gameweek']):
+                finalized[int(league_id)].add(int(gameweek))
+        return finalized
+    table_id = f"{client.project}.{BQ_DATASET_ID}.{WATERMARK_TABLE}"
+    if not table_exists(client, table_id):
+        return finalized
+    ensure_league_keyed(client, WATERMARK_TABLE)
+    rows = client.query(
+        f"SELECT league_id, gameweek FROM `{table_id}` WHERE finalized AND league_id IN UNNEST(@league_ids)",
+        job_config=bigquery.QueryJobConfig(query_parameters=[
+            bigquery.ArrayQueryParameter("league_ids", "INT64", sorted(league_ids)),
+        ]),
+    ).result()
+    for row in rows:
+        finalized[row['league_id']].add(row['gameweek'])
+    return finalized
+
+def get_loaded_gameweeks(gw_stats, mgr_picks, league_entries):
+    """
+    Returns {league_id: gameweeks with data actually loaded}: the global live stats
+    must be present, plus the league's picks when it has any entries.
+    """
+    live_gws = set(gw_stats['gameweek']) if not gw_stats.empty else set()
+    loaded = {}
+    for league_id, entry_ids in league_entries.items():
+        if entry_ids and not mgr_picks.empty:
+            league_gws = set(mgr_picks.loc[mgr_picks['league_id'] == league_id, 'gameweek'])
+            loaded[league_id] = live_gws & league_gws
+        elif entry_ids:
+            loaded[league_id] = set()
+        else:
+            loaded[league_id] = live_gws
+    return loaded
+
+def update_watermark(client, league_gameweeks, finished_gws, loaded_gws):
+    """
+    Records the outcome of a run for each processed (league, gameweek). A gameweek is
+    finalized once the API reports it finished and its data was actually loaded, so
+    an incremental run never skips a gameweek that failed to fetch.
+    """
+    rows = [
+        {
+            'league_id': league_id,
+            'gameweek': gw,
+            'finalized': gw in finished_gws and gw in loaded_gws.get(league_id, set()),
+        }
+        for league_id, gameweeks in league_gameweeks.items()
+        for gw in gameweeks
+    ]
+    if not rows:
+        return
+    replace_gameweeks(client, pd.DataFrame(rows), WATERMARK_TABLE, None, league_gameweeks=league_gameweeks)
+
+# --- HTTP ---
+
+def fetch_json(url):
+    """
+    GETs a URL through the response cache and the shared rate-limited client.
+    Returns the parsed body, or None for a non-retryable non-200 (e.g. 404).
+    Raises FetchError once retries on 429/5xx/connection errors are exhausted.
+    """
+    body = response_cache.fetch(url, ttl_for(url, FINISHED_GAMEWEEKS), send=http_client.send)
+    if body is None:
+        return None
+    return json.loads(body)
 
 # --- Data Fetching Functions ---
 
 def fetch_bootstrap_static():
     """Fetches core metadata: elements (players), teams, element_types."""
-    url = "https://draft.premierleague.com/api/bootstrap-static"
+    url = f"{FPL_API_BASE_URL}/bootstrap-static"
     print(f"Fetching {url}...")
-    r = requests.get(url)
-    if r.status_code != 200:
-        return None, None, None
-    data = r.json()
+    data = fetch_json(url)
+    if data is None:
+        return None, None, None, None
     
     # Process Elements
     elements = pd.DataFrame(data['elements'])
-    # Keep key columns but can ingest mostly everything
+    # Columns are pruned to the dim_elements manifest at load time (table_schemas.py)
     
     # Process Teams
     teams = pd.DataFrame(data['teams'])
@@ -85,160 +525,365 @@ def fetch_bootstrap_static():
     
     return elements, teams, element_types, data['events']
 
-def fetch_gameweek_live(gameweek, element_ids_df):
-    """Fetches stats for all players for a specific gameweek."""
-    url = f"https://draft.premierleague.com/api/event/{gameweek}/live"
-    print(f"Fetching {url}...")
-    r = requests.get(url)
-    if r.status_code != 200:
+def parse_gameweek_live(payload, gameweek):
+    """
+    Decodes an /event/{gw}/live payload column by column, one row per player.
+    Only the stats in the fact_gameweek_live manifest are decoded, each straight
+    into its column of one contiguous int16 block. No per-player dicts are built.
+    """
+    if payload is None or not payload['elements']:
         return pd.DataFrame()
     
-    data = r.json()['elements']
+    # data is a dict keyed by element_id
+    data = payload['elements']
+    n = len(data)
     
-    # data is a dict keyed by element_id. Need to flatten.
-    all_stats = []
+    manifest = TABLE_MANIFESTS['fact_gameweek_live']
+    stat_fields = [field for field in manifest if field not in ('gameweek', 'element_id')]
     
-    # We iterate through the official element list to ensure we capture everyone
-    # or just iterate the response keys
-    for element_id, info in data.items():
-        stats = info['stats']
-        stats['element_id'] = int(element_id)
-        stats['gameweek'] = gameweek
-        all_stats.append(stats)
-        
-    return pd.DataFrame(all_stats)
+    # Fortran order keeps each stat column contiguous, and pandas adopts the block as-is
+    stat_block = np.empty((n, len(stat_fields)), dtype=np.int16, order='F')
+    for j, field in enumerate(stat_fields):
+        stat_block[:, j] = np.fromiter((info['stats'].get(field) or 0 for info in data.values()), dtype=np.int16, count=n)
+    
+    keys = pd.DataFrame({
+        'element_id': np.fromiter(data.keys(), dtype=manifest['element_id'], count=n),
+        'gameweek': np.full(n, gameweek, dtype=manifest['gameweek']),
+    })
+    return pd.concat([keys, pd.DataFrame(stat_block, columns=stat_fields, copy=False)], axis=1)
 
 def fetch_draft_picks(league_id):
     """Fetches the initial draft picks."""
-    url = f"https://draft.premierleague.com/api/draft/{league_id}/choices"
+    url = f"{FPL_API_BASE_URL}/draft/{league_id}/choices"
     print(f"Fetching {url}...")
-    r = requests.get(url)
-    if r.status_code != 200:
+    data = fetch_json(url)
+    if data is None:
         return pd.DataFrame()
     
-    data = r.json()['choices']
-    return pd.DataFrame(data)
-
-def fetch_manager_weekly_picks(league_id, entry_ids, gameweek):
-    """Fetches picks and subs for each manager for a gameweek."""
-    all_picks = []
-    
-    for entry_id in entry_ids:
-        url = f"https://draft.premierleague.com/api/entry/{entry_id}/event/{gameweek}"
-        r = requests.get(url)
-        if r.status_code == 200:
-            data = r.json()
-            picks = data['picks']
-            # Add metadata
-            for p in picks:
-                p['entry_id'] = entry_id
-                p['gameweek'] = gameweek
-                all_picks.append(p)
-                
-    return pd.DataFrame(all_picks)
+    return pd.DataFrame(data['choices'])
+
+def parse_manager_picks(payload, entry_id, gameweek, league_id):
+    """Tags each pick in an /entry/{id}/event/{gw} payload with its entry, gameweek and league."""
+    if payload is None:
+        return []
+    
+    picks = payload['picks']
+    # Add metadata
+    for p in picks:
+        p['entry_id'] = entry_id
+        p['gameweek'] = gameweek
+        p['league_id'] = int(league_id)
+    return picks
+
+def fetch_weekly_data(gameweeks, league_entries, league_gameweeks=None):
+    """
+    Fetches player stats and manager picks in one fan-out. /event/{gw}/live is global
+    and fetched once per gameweek however many leagues there are; each league's
+    entries ({league_id: entry_ids}) are fetched for its own gameweeks
+    (league_gameweeks, default: all of them).
+    All calls share the keep-alive session and run at most FETCH_CONCURRENCY at a time.
+    Returns (gameweek_stats_df, manager_picks_df), ordered by gameweek then league and entry.
+    """
+    gameweeks = list(gameweeks)
+    if league_gameweeks is None:
+        league_gameweeks = {league_id: gameweeks for league_id in league_entries}
+    entry_requests = [
+        (gw, league_id, entry_id)
+        for gw in gameweeks
+        for league_id, entry_ids in league_entries.items()
+        if gw in league_gameweeks.get(league_id, ())
+        for entry_id in entry_ids
+    ]
+    print(f"Fetching {len(gameweeks)} gameweeks for {len(league_entries)} leagues "
+          f"({len(gameweeks) + len(entry_requests)} requests, concurrency {FETCH_CONCURRENCY})...")
+    
+    pool = ThreadPoolExecutor(max_workers=FETCH_CONCURRENCY)
+    try:
+        live_futures = {
+            gw: pool.submit(fetch_json, f"{FPL_API_BASE_URL}/event/{gw}/live")
+            for gw in gameweeks
+        }
+        pick_futures = {
+            key: pool.submit(fetch_json, f"{FPL_API_BASE_URL}/entry/{key[2]}/event/{key[0]}")
+            for key in entry_requests
+        }
+        
+        all_gw_stats = []
+        for gw in gameweeks:
+            gw_stats = parse_gameweek_live(live_futures[gw].result(), gw)
+            if not gw_stats.empty:
+                all_gw_stats.append(gw_stats)
+        all_manager_picks = []
+        for (gw, league_id, entry_id), future in pick_futures.items():
+            all_manager_picks.extend(parse_manager_picks(future.result(), entry_id, gw, league_id))
+    except BaseException:
+        # Drop the requests still queued instead of sending them all before the error surfaces
+        pool.shutdown(wait=True, cancel_futures=True)
+        raise
+    pool.shutdown()
+    
+    gw_stats_df = pd.concat(all_gw_stats, ignore_index=True) if all_gw_stats else pd.DataFrame()
+    return gw_stats_df, pd.DataFrame(all_manager_picks)
+
+def iter_weekly_chunks(gameweeks, league_entries, league_gameweeks=None, chunk_size=STREAM_CHUNK_GAMEWEEKS):
+    """
+    Yields (chunk_gameweeks, gameweek_stats_df, manager_picks_df) for consecutive
+    chunks of gameweeks. The next chunk is fetched while the caller writes the
+    current one, so at most two chunks are held in memory at any time.
+    """
+    gameweeks = list(gameweeks)
+    chunks = [gameweeks[i:i + chunk_size] for i in range(0, len(gameweeks), chunk_size)]
+    if not chunks:
+        return
+    
+    with ThreadPoolExecutor(max_workers=1) as prefetcher:
+        pending = prefetcher.submit(fetch_weekly_data, chunks[0], league_entries, league_gameweeks)
+        for i, chunk in enumerate(chunks):
+            gw_stats, mgr_picks = pending.result()
+            if i + 1 < len(chunks):
+                pending = prefetcher.submit(fetch_weekly_data, chunks[i + 1], league_entries, league_gameweeks)
+            yield chunk, gw_stats, mgr_picks
 
 def fetch_league_entries(league_id):
     """Gets the list of managers/teams in the league."""
     # The 'choices' endpoint returns entry_id and entry_name, which is useful
     # simpler than another call if we already have it.
-    # Alternatively use: https://draft.premierleague.com/api/league/{league_id}/details
-    url = f"https://draft.premierleague.com/api/league/{league_id}/details"
+    # Alternatively use: {FPL_API_BASE_URL}/league/{league_id}/details
+    url = f"{FPL_API_BASE_URL}/league/{league_id}/details"
     print(f"Fetching {url}...")
-    r = requests.get(url)
-    if r.status_code != 200:
+    data = fetch_json(url)
+    if data is None:
         return []
     
-    return r.json()['league_entries']
+    return data['league_entries']
 
 
 # --- Main Orchestration ---
 
-def run_ingestion():
-    client = get_bigquery_client()
-    if not client:
-        return
-    ensure_dataset_exists(client, BQ_DATASET_ID)
+def restrict_league_gameweeks(league_gameweeks, gameweeks):
+    """Narrows {league_id: gameweeks} to the given gameweeks."""
+    gameweeks = set(gameweeks)
+    return {league_id: sorted(gameweeks.intersection(gws)) for league_id, gws in league_gameweeks.items()}
+
+def ingest_weekly_streaming(client, league_entries, league_gameweeks, finished_gws):
+    """
+    Fetch -> normalize -> write one chunk of gameweeks at a time. Each chunk replaces
+    its own gameweek partitions and advances the watermark before the next one is
+    written, so a failure leaves every earlier chunk committed and an
+    --incremental run picks up where this one stopped.
+    """
+    gameweeks = sorted(set().union(*league_gameweeks.values()))
+    committed_gws = []
+    try:
+        for chunk, gw_stats, mgr_picks in iter_weekly_chunks(gameweeks, league_entries, league_gameweeks):
+            chunk_league_gws = restrict_league_gameweeks(league_gameweeks, chunk)
+            if not gw_stats.empty:
+                replace_gameweeks(client, gw_stats, "fact_gameweek_live", chunk)
+            if not mgr_picks.empty:
+                replace_gameweeks(client, mgr_picks, "fact_entry_weekly", chunk, league_gameweeks=chunk_league_gws)
+            loaded_gws = get_loaded_gameweeks(gw_stats, mgr_picks, league_entries)
+            update_watermark(client, chunk_league_gws, finished_gws, loaded_gws)
+            committed_gws.extend(chunk)
+            print(f"Committed gameweeks {chunk[0]}-{chunk[-1]}.")
+    except Exception:
+        print(f"Streaming ingestion failed after committing gameweeks {committed_gws}. "
+              f"Re-run with --incremental --stream to resume.")
+        raise
 
-    # 1. Static Data
+def get_gameweek_status(events):
+    """Returns (current gameweek, set of finished gameweeks) from the bootstrap events."""
+    # The Draft API 'events' key is a dict ({'current', 'next', 'data': [...]}),
+    # unlike the main FPL API where it is a list of event dicts.
+    # Infer max gameweek from the events data if possible, or default to 38.
+    max_gw = 38
+    finished_gws = set()
+    try:
+        if isinstance(events, list):
+            event_list = events
+            current_gw_event = next((e for e in events if e.get('is_current')), None)
+            if current_gw_event:
+                max_gw = current_gw_event['id']
+        elif isinstance(events, dict):
+            event_list = events.get('data', [])
+            if events.get('current'):
+                max_gw = events['current']
+        else:
+            event_list = []
+        # data_checked flips once bonus points and late corrections are confirmed
+        finished_gws = {
+            e['id'] for e in event_list
+            if e.get('finished') and e.get('data_checked', True)
+        }
+    except Exception as e:
+        print(f"Could not determine current gameweek from events, defaulting to {max_gw}: {e}")
+    return max_gw, finished_gws
+
+def run_ingestion(incremental=False, stream=False, dry_run=False, league_ids=None, storage=STORAGE_BACKEND, on_stage=None):
+    """
+    Runs one ingest. on_stage(name) is called as each stage starts ("static", "league",
+    "weekly", "load", "materialize"); the API's refresh job runner times stages with it.
+    Returns the refresh_id of the new league snapshot, or None if none was written.
+    """
+    try:
+        return _run_ingestion(incremental, stream, dry_run, league_ids, storage, on_stage or (lambda name: None))
+    finally:
+        http_client.report()
+        print(f"Response cache: {response_cache.hits} hits, {response_cache.revalidated} revalidated, {response_cache.misses} misses")
+
+def _run_ingestion(incremental, stream, dry_run, league_ids, storage, on_stage):
+    league_ids = [int(league_id) for league_id in (league_ids or LEAGUE_IDS)]
+    if dry_run:
+        # Fetch, normalize and serialize everything, but skip every warehouse write
+        print("Dry run: nothing will be written to BigQuery.")
+        client = None
+    elif storage == "local":
+        client = LocalStore()
+        print(f"Local storage: writing Parquet tables to {client.data_dir}.")
+    else:
+        client = get_bigquery_client()
+        if not client:
+            raise RuntimeError("Failed to initialize BigQuery client")
+        ensure_dataset_exists(client, BQ_DATASET_ID)
+
+    # 1. Static Data (global, shared by every league)
+    on_stage("static")
     print("\n--- Ingesting Static Data ---")
     elements, teams, element_types, events = fetch_bootstrap_static()
     
     if elements is not None:
-        load_dataframe_to_bigquery(client, elements, "dim_elements")
-        load_dataframe_to_bigquery(client, teams, "dim_teams")
-        load_dataframe_to_bigquery(client, element_types, "dim_element_types")
-        
-        # Determine current/next gameweek
-        # The Draft API 'events' key might not be a list of dicts like the main FPL API.
-        # It seems 'events' in bootstrap-static for Draft might be different.
-        # Let's try to infer max gameweek from the events data if possible, or default to 38.
-        
-        max_gw = 38
-        try:
-            # If events is a dict (which the error suggests it might not be what we expect)
-            # or if it's the main FPL structure.
-            # Let's just try to find the "current" one.
-            if isinstance(events, list):
-                current_gw_event = next((e for e in events if e.get('is_current')), None)
-                if current_gw_event:
-                    max_gw = current_gw_event['id']
-            elif isinstance(events, dict):
-                 # Draft API sometimes puts 'current' directly in top level or structure is different
-                 if 'current' in events:
-                     max_gw = events['current']
-        except Exception as e:
-            print(f"Could not determine current gameweek from events, defaulting to {max_gw}: {e}")
-            
-        print(f"Current/Max processed Gameweek: {max_gw}")
+        max_gw, finished_gws = get_gameweek_status(events)
+        FINISHED_GAMEWEEKS.clear()
+        FINISHED_GAMEWEEKS.update(finished_gws)
+        print(f"Current/Max processed Gameweek: {max_gw} ({len(finished_gws)} finished)")
     else:
         print("Failed to fetch static data. Aborting.")
-        return
+        raise RuntimeError("Failed to fetch static data")
 
-    # 2. Draft Picks
-    print("\n--- Ingesting Draft Picks & League Entries ---")
-    draft_picks = fetch_draft_picks(LEAGUE_ID)
-    
-    entries_list = fetch_league_entries(LEAGUE_ID)
-    entries_df = pd.DataFrame(entries_list)
-    if not entries_df.empty:
+    # 2. Draft Picks & League Entries (per league)
+    on_stage("league")
+    print(f"\n--- Ingesting Draft Picks & League Entries for {len(league_ids)} league(s) ---")
+    league_entries = {}
+    all_draft_picks = []
+    all_entries = []
+    for league_id in league_ids:
+        draft_picks = fetch_draft_picks(league_id)
+        entries_list = fetch_league_entries(league_id)
         # Keep relevant columns: entry_id, entry_name, player_first_name, player_last_name, short_name
-        load_dataframe_to_bigquery(client, entries_df, "dim_entries")
+        entries_df = pd.DataFrame(entries_list)
 
-    if not draft_picks.empty:
-        load_dataframe_to_bigquery(client, draft_picks, "fact_draft_picks")
-        entry_ids = [e['entry_id'] for e in entries_list]
-    else:
-        entry_ids = []
+        if not draft_picks.empty:
+            draft_picks['league_id'] = league_id
+            all_draft_picks.append(draft_picks)
+            league_entries[league_id] = [e['entry_id'] for e in entries_list]
+        else:
+            league_entries[league_id] = []
+        if not entries_df.empty:
+            entries_df['league_id'] = league_id
+            all_entries.append(entries_df)
+
+    # Dimensions and draft picks are independent loads, submitted as one group
+    static_frames = {
+        "dim_elements": elements,
+        "dim_teams": teams,
+        "dim_element_types": element_types,
+        "dim_entries": pd.concat(all_entries, ignore_index=True) if all_entries else pd.DataFrame(),
+        "fact_draft_picks": pd.concat(all_draft_picks, ignore_index=True) if all_draft_picks else pd.DataFrame(),
+    }
+    if incremental or stream:
+        replace_leagues(client, static_frames)
 
     # 3. Weekly Stats loops
+    on_stage("weekly")
     print("\n--- Ingesting Weekly Data (This may take a moment) ---")
     
-    all_gw_stats = []
-    all_manager_picks = []
+    all_gws = list(range(1, max_gw + 1))
+    if incremental:
+        finalized_gws = get_finalized_gameweeks(client, league_ids)
+        league_gameweeks = {
+            league_id: [gw for gw in all_gws if gw not in finalized_gws[league_id]]
+            for league_id in league_ids
+        }
+        for league_id, gws in league_gameweeks.items():
+            print(f"Incremental mode: league {league_id} has {len(finalized_gws[league_id])} gameweeks finalized, fetching {gws}")
+    else:
+        league_gameweeks = {league_id: all_gws for league_id in league_ids}
+    # Live stats are fetched once for the union of every league's pending gameweeks
+    gameweeks = sorted(set().union(*league_gameweeks.values()))
+    if not gameweeks:
+        print("Nothing to ingest.")
+        # Dimensions were still reloaded, so names in the snapshot may have changed
+        on_stage("materialize")
+        return materialize(client, league_gameweeks={})
 
-    # We loop from GW 1 to current max
-    for gw in range(1, max_gw + 1):
-        print(f"Processing Gameweek {gw}...")
-        
-        # Player Stats
-        gw_stats = fetch_gameweek_live(gw, elements)
-        if not gw_stats.empty:
-            all_gw_stats.append(gw_stats)
-            
-        # Manager Picks
-        if entry_ids:
-            mgr_picks = fetch_manager_weekly_picks(LEAGUE_ID, entry_ids, gw)
-            if not mgr_picks.empty:
-                all_manager_picks.append(mgr_picks)
+    if stream:
+        # Each chunk is fetched and loaded in turn, so "weekly" covers the loads too
+        ingest_weekly_streaming(client, league_entries, league_gameweeks, finished_gws)
+        on_stage("materialize")
+        return materialize(client, league_gameweeks=league_gameweeks)
+
+    # Every pending gameweek is fetched in a single concurrent fan-out
+    combined_gw_stats, combined_manager_picks = fetch_weekly_data(gameweeks, league_entries, league_gameweeks)
 
     # Bulk Load Weekly Data
-    if all_gw_stats:
-        combined_gw_stats = pd.concat(all_gw_stats, ignore_index=True)
-        load_dataframe_to_bigquery(client, combined_gw_stats, "fact_gameweek_live")
-        
-    if all_manager_picks:
-        combined_manager_picks = pd.concat(all_manager_picks, ignore_index=True)
-        load_dataframe_to_bigquery(client, combined_manager_picks, "fact_entry_weekly")
+    on_stage("load")
+    if incremental:
+        # Only the fetched gameweeks are replaced; finalized partitions are left untouched
+        if not combined_gw_stats.empty:
+            replace_gameweeks(client, combined_gw_stats, "fact_gameweek_live", gameweeks)
+        if not combined_manager_picks.empty:
+            replace_gameweeks(client, combined_manager_picks, "fact_entry_weekly", gameweeks, league_gameweeks=league_gameweeks)
+    else:
+        # A full reload rewrites every table in a single parallel load group; league-keyed
+        # tables only for the leagues in this run, so other leagues' rows are kept
+        frames = {
+            **static_frames,
+            "fact_gameweek_live": combined_gw_stats,
+            "fact_entry_weekly": combined_manager_picks,
+        }
+        replace_leagues(client, frames)
+
+    loaded_gws = get_loaded_gameweeks(combined_gw_stats, combined_manager_picks, league_entries)
+    update_watermark(client, league_gameweeks, finished_gws, loaded_gws)
+
+    # 4. League snapshot for the API (a full reload rebuilds its base table from scratch)
+    on_stage("materialize")
+    return materialize(client, league_gameweeks=league_gameweeks if incremental else None)
 
 if __name__ == "__main__":
-    run_ingestion()
+    parser = argparse.ArgumentParser(description="Fetch FPL Draft data and load it into BigQuery.")
+    parser.add_argument(
+        "--leagues",
+        default=",".join(LEAGUE_IDS),
+        help="Comma-separated draft league IDs to ingest in one run (default from FPL_LEAGUE_IDS / FPL_LEAGUE_ID).",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        default=INGEST_MODE == "incremental",
+        help="Only fetch and replace gameweeks that are not finalized yet (default from INGEST_MODE).",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        default=INGEST_STREAM,
+        help=f"Write gameweeks in chunks of {STREAM_CHUNK_GAMEWEEKS} with bounded memory (default from INGEST_STREAM).",
+    )
+    parser.add_argument(
+        "--storage",
+        choices=("bigquery", "local"),
+        default=STORAGE_BACKEND,
+        help="Load into BigQuery or write local Parquet tables for the DuckDB engine (default from STORAGE_BACKEND).",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Fetch and serialize everything without touching BigQuery (used by benchmark.py).",
+    )
+    args = parser.parse_args()
+    run_ingestion(
+        incremental=args.incremental,
+        stream=args.stream,
+        dry_run=args.dry_run,
+        storage=args.storage,
+        league_ids=[league_id for league_id in args.leagues.split(",") if league_id.strip()],
+    )
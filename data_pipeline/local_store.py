@@ -0,0 +1,79 @@
+"""
+Local storage for the pipeline: every warehouse table as a Parquet file, so the
+whole stack runs without GCP.
+
+    STORAGE_BACKEND=local python ingest.py
+
+Each table is one Parquet file under LOCAL_DATA_DIR (default data_pipeline/local_data).
+Writes go to a temporary file that then replaces the table, so a reader (the API's
+DuckDB engine, see backend/storage.py) never sees a half-written table. Tables are
+league-sized, so appends and deletes simply rewrite the file.
+"""
+import os
+import threading
+from pathlib import Path
+import pandas as pd
+import pyarrow.parquet as pq
+from table_schemas import arrow_table
+
+LOCAL_DATA_DIR = os.getenv('LOCAL_DATA_DIR', str(Path(__file__).resolve().parent / "local_data"))
+PARQUET_COMPRESSION = 'zstd'
+
+
+class LocalStore:
+    def __init__(self, data_dir=LOCAL_DATA_DIR):
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        # Loads of different tables run in parallel; a read-modify-write of one table must not
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def table_path(self, table_name):
+        return self.data_dir / f"{table_name}.parquet"
+
+    def table_exists(self, table_name):
+        return self.table_path(table_name).exists()
+
+    def _lock(self, table_name):
+        with self._locks_guard:
+            return self._locks.setdefault(table_name, threading.Lock())
+
+    def read_table(self, table_name):
+        """Returns the table as a DataFrame, or None if it was never written."""
+        if not self.table_exists(table_name):
+            return None
+        return pd.read_parquet(self.table_path(table_name))
+
+    def _replace(self, df, table_name):
+        path = self.table_path(table_name)
+        tmp_path = path.with_suffix(".parquet.tmp")
+        pq.write_table(arrow_table(df, table_name), tmp_path, compression=PARQUET_COMPRESSION)
+        os.replace(tmp_path, path)
+        return path.stat().st_size
+
+    def write_table(self, df, table_name, write_disposition="WRITE_TRUNCATE"):
+        """Writes a frame with BigQuery load semantics (WRITE_TRUNCATE / WRITE_APPEND). Returns bytes on disk."""
+        with self._lock(table_name):
+            existing = self.read_table(table_name) if write_disposition == "WRITE_APPEND" else None
+            if existing is not None and not existing.empty:
+                df = pd.concat([existing, df], ignore_index=True)
+            return self._replace(df, table_name)
+
+    def delete_rows(self, table_name, gameweeks=None, league_ids=None, league_gameweeks=None):
+        """Same filters as ingest.delete_rows. Returns the number of rows deleted."""
+        with self._lock(table_name):
+            df = self.read_table(table_name)
+            if df is None:
+                return 0
+            matches = pd.Series(True, index=df.index)
+            if league_gameweeks:
+                keys = {(league_id, gw) for league_id, gws in league_gameweeks.items() for gw in gws}
+                matches &= pd.Series([key in keys for key in zip(df['league_id'], df['gameweek'])], index=df.index)
+            if gameweeks is not None:
+                matches &= df['gameweek'].isin(list(gameweeks))
+            if league_ids is not None:
+                matches &= df['league_id'].isin(list(league_ids))
+            n_deleted = int(matches.sum())
+            if n_deleted:
+                self._replace(df[~matches], table_name)
+            return n_deleted
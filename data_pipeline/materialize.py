@@ -0,0 +1,194 @@
+"""
+Materialization stage, run by ingest.py after every load (or by hand):
+
+    python materialize.py                # full rebuild
+    python materialize.py --snapshot-only
+
+mat_manager_gameweek is the physical form of the dim_manager_gameweek view, holding
+keys and points only (names are joined from the dimensions when aggregating). It is
+refreshed incrementally: the (league, gameweek) pairs an ingest run rewrote are
+deleted and re-inserted inside one transaction. materialize.sql then rolls it up in
+a single scan into league_snapshot, one row per league holding every dashboard
+chart, tagged with a new refresh_id. The API serves the latest snapshot of a league
+with one small read instead of re-running the view stack per chart.
+
+The new snapshot is also exported to WARM_START_PATH as an Arrow IPC file, which
+the API loads at startup to answer its first requests without a BigQuery job:
+
+    python materialize.py --export-warm-start   # export the latest snapshot only
+"""
+import os
+import time
+import argparse
+from datetime import datetime, timezone
+from pathlib import Path
+import pyarrow as pa
+import pyarrow.ipc
+from google.cloud import bigquery
+from google.api_core.exceptions import NotFound
+from dotenv import load_dotenv
+from local_store import LocalStore
+
+# Load environment variables
+load_dotenv()
+
+GCP_PROJECT_ID = os.getenv('GCP_PROJECT_ID')
+BQ_DATASET_ID = os.getenv('BQ_DATASET_ID', 'fpl_draft_data')
+
+BASE_TABLE = "mat_manager_gameweek"
+SNAPSHOT_TABLE = "league_snapshot"
+SNAPSHOT_SQL_PATH = Path(__file__).resolve().parent / "materialize.sql"
+# Warm-start file for API cold starts (bundled into the image or on a mounted volume); empty disables it
+WARM_START_PATH = os.getenv('WARM_START_PATH', str(Path(__file__).resolve().parent / "warm_start" / "league_snapshot.arrow"))
+
+BASE_COLUMNS = "league_id, gameweek, entry_id, element_id, lineup, total_points, is_captain, is_vice_captain"
+BASE_SELECT = """
+    SELECT
+        ew.league_id,
+        ew.gameweek,
+        ew.entry_id,
+        ew.element AS element_id,
+        CASE WHEN ew.position < 12 THEN 'On Field' ELSE 'Sub' END AS lineup,
+        s.total_points,
+        ew.is_captain,
+        ew.is_vice_captain
+    FROM `{dataset}.fact_entry_weekly` ew
+    JOIN `{dataset}.fact_gameweek_live` s
+        ON ew.element = s.element_id AND ew.gameweek = s.gameweek
+"""
+
+def _dataset(client):
+    return f"{client.project}.{BQ_DATASET_ID}"
+
+def _table_exists(client, table_id):
+    try:
+        client.get_table(table_id)
+        return True
+    except NotFound:
+        return False
+
+def rebuild_base_table(client):
+    """Recreates mat_manager_gameweek from the full fact tables."""
+    dataset = _dataset(client)
+    client.query(f"""
+        CREATE OR REPLACE TABLE `{dataset}.{BASE_TABLE}`
+        PARTITION BY RANGE_BUCKET(gameweek, GENERATE_ARRAY(1, 40, 1))
+        CLUSTER BY league_id, entry_id
+        AS {BASE_SELECT.format(dataset=dataset)}
+    """).result()
+    print(f"Rebuilt {BASE_TABLE}.")
+
+def refresh_base_table(client, league_gameweeks):
+    """
+    Replaces only the given {league_id: gameweeks} in mat_manager_gameweek. Delete and
+    insert run in one transaction, so readers never see a gameweek missing.
+    """
+    keys = [f"{league_id}:{gw}" for league_id, gws in league_gameweeks.items() for gw in gws]
+    if not keys:
+        print(f"{BASE_TABLE}: no gameweeks changed.")
+        return
+    gameweeks = sorted(set().union(*league_gameweeks.values()))
+    dataset = _dataset(client)
+    # The plain gameweek filter keeps partition pruning; the key filter makes it exact per league
+    condition = """
+        {alias}gameweek IN UNNEST(@gameweeks)
+        AND CONCAT(CAST({alias}league_id AS STRING), ':', CAST({alias}gameweek AS STRING)) IN UNNEST(@keys)
+    """
+    client.query(
+        f"""
+        BEGIN TRANSACTION;
+        DELETE FROM `{dataset}.{BASE_TABLE}` WHERE {condition.format(alias='')};
+        INSERT INTO `{dataset}.{BASE_TABLE}` ({BASE_COLUMNS})
+        {BASE_SELECT.format(dataset=dataset)}
+        WHERE {condition.format(alias='ew.')};
+        COMMIT TRANSACTION;
+        """,
+        job_config=bigquery.QueryJobConfig(query_parameters=[
+            bigquery.ArrayQueryParameter("gameweeks", "INT64", gameweeks),
+            bigquery.ArrayQueryParameter("keys", "STRING", keys),
+        ]),
+    ).result()
+    print(f"Refreshed {BASE_TABLE} for {len(keys)} (league, gameweek) pairs.")
+
+def refresh_snapshot(client, refresh_id):
+    """Appends a league_snapshot row per league for refresh_id, in a single script job."""
+    script = SNAPSHOT_SQL_PATH.read_text().format(project_id=client.project, dataset_id=BQ_DATASET_ID)
+    job = client.query(script, job_config=bigquery.QueryJobConfig(query_parameters=[
+        bigquery.ScalarQueryParameter("refresh_id", "STRING", refresh_id),
+    ]))
+    job.result()
+    print(f"Wrote {SNAPSHOT_TABLE} {refresh_id} ({(job.total_bytes_processed or 0) / 1024 / 1024:.1f} MiB processed).")
+
+def export_warm_start(client, refresh_id=None):
+    """
+    Writes the league_snapshot rows of refresh_id (default: the latest refresh) to
+    WARM_START_PATH as an Arrow IPC file. The file is replaced atomically.
+    """
+    if not WARM_START_PATH:
+        return
+    dataset = _dataset(client)
+    if refresh_id is None:
+        condition = f"refresh_id = (SELECT MAX(refresh_id) FROM `{dataset}.{SNAPSHOT_TABLE}`)"
+        params = []
+    else:
+        condition = "refresh_id = @refresh_id"
+        params = [bigquery.ScalarQueryParameter("refresh_id", "STRING", refresh_id)]
+    table = client.query(
+        f"SELECT * FROM `{dataset}.{SNAPSHOT_TABLE}` WHERE {condition}",
+        job_config=bigquery.QueryJobConfig(query_parameters=params),
+    ).to_arrow(create_bqstorage_client=False)
+    if table.num_rows == 0:
+        print(f"No {SNAPSHOT_TABLE} rows to export for the warm start.")
+        return
+
+    path = Path(WARM_START_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with pa.OSFile(str(tmp_path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, path)
+    print(f"Exported {table.num_rows} league snapshot(s) to {path} ({path.stat().st_size / 1024:.1f} KiB).")
+
+def materialize(client, league_gameweeks=None):
+    """
+    Brings mat_manager_gameweek and league_snapshot up to date after an ingest run.
+    league_gameweeks ({league_id: gameweeks}) lists the pairs that were rewritten;
+    None rebuilds the base table from scratch. Returns the new refresh_id, or None
+    with no client (dry run) or local storage, whose API engine reads the views directly.
+    """
+    if client is None or isinstance(client, LocalStore):
+        return None
+    print("\n--- Materializing League Snapshot ---")
+    started = time.perf_counter()
+    if league_gameweeks is None or not _table_exists(client, f"{_dataset(client)}.{BASE_TABLE}"):
+        rebuild_base_table(client)
+    else:
+        refresh_base_table(client, league_gameweeks)
+    refresh_id = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')
+    refresh_snapshot(client, refresh_id)
+    try:
+        export_warm_start(client, refresh_id)
+    except Exception as e:
+        # The API falls back to BigQuery on a cold start; not worth failing the refresh for
+        print(f"Failed to export the warm-start snapshot: {e}")
+    print(f"Materialization finished in {time.perf_counter() - started:.2f}s.")
+    return refresh_id
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild mat_manager_gameweek and write a new league snapshot.")
+    parser.add_argument(
+        "--snapshot-only",
+        action="store_true",
+        help="Keep mat_manager_gameweek as is and only write a new league_snapshot.",
+    )
+    parser.add_argument(
+        "--export-warm-start",
+        action="store_true",
+        help=f"Only export the latest league_snapshot to the warm-start file ({WARM_START_PATH}).",
+    )
+    args = parser.parse_args()
+    client = bigquery.Client(project=GCP_PROJECT_ID) if GCP_PROJECT_ID else bigquery.Client()
+    if args.export_warm_start:
+        export_warm_start(client)
+    else:
+        materialize(client, league_gameweeks={} if args.snapshot_only else None)
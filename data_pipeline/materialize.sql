@@ -0,0 +1,182 @@
+-- League snapshot: every dashboard chart for every league, rebuilt from mat_manager_gameweek
+-- after each ingest and appended as one row per league tagged with @refresh_id.
+-- Run as one script by materialize.py. The base table is scanned once: a GROUPING SETS
+-- rollup produces the per-manager, per-gameweek and per-player totals every chart is cut
+-- from, and only that small rollup is read afterwards. Momentum alone reads the last four
+-- gameweeks separately: current_gw is a script variable, a constant to the planner, so that
+-- read prunes to four partitions. Each chart mirrors the agg_* view of the same name in
+-- create_views.sql.
+
+DECLARE current_gw INT64 DEFAULT (SELECT MAX(gameweek) FROM `{project_id}.{dataset_id}.fact_gameweek_live`);
+
+CREATE TABLE IF NOT EXISTS `{project_id}.{dataset_id}.league_snapshot` (
+    refresh_id STRING,
+    refreshed_at TIMESTAMP,
+    league_id INT64,
+    standings ARRAY<STRUCT<entry_id INT64, manager_name STRING, total_points INT64, rank INT64>>,
+    momentum ARRAY<STRUCT<entry_id INT64, manager_name STRING, total_points_last_4_gw INT64>>,
+    bench_points ARRAY<STRUCT<entry_id INT64, manager_name STRING, bench_points INT64>>,
+    contributions ARRAY<STRUCT<entry_id INT64, manager_name STRING, web_name STRING, total_points INT64>>,
+    consistency ARRAY<STRUCT<gameweek INT64, entry_id INT64, manager_name STRING, weekly_points INT64>>,
+    draft_analysis ARRAY<STRUCT<manager_name STRING, pick INT64, round INT64, element_id INT64, player_name STRING, total_points_contributed INT64, pick_bucket STRING>>,
+    top_transfers ARRAY<STRUCT<player_name STRING, manager_name STRING, total_points INT64>>
+)
+CLUSTER BY league_id;
+
+-- The single scan: totals per manager, per manager-gameweek and per manager-player
+CREATE TEMP TABLE rollup AS
+SELECT
+    m.league_id,
+    m.entry_id,
+    e.entry_name AS manager_name,
+    m.lineup,
+    m.gameweek,
+    m.element_id,
+    GROUPING(m.gameweek) = 0 AS by_gameweek,
+    GROUPING(m.element_id) = 0 AS by_element,
+    SUM(m.total_points) AS points
+FROM `{project_id}.{dataset_id}.mat_manager_gameweek` m
+JOIN `{project_id}.{dataset_id}.dim_entries` e
+    ON m.entry_id = e.entry_id AND m.league_id = e.league_id
+GROUP BY GROUPING SETS (
+    (m.league_id, m.entry_id, e.entry_name, m.lineup),
+    (m.league_id, m.entry_id, e.entry_name, m.lineup, m.gameweek),
+    (m.league_id, m.entry_id, e.entry_name, m.lineup, m.element_id)
+);
+
+-- On-field points over the last four gameweeks (agg_manager_momentum), read from their partitions only
+CREATE TEMP TABLE recent_points AS
+SELECT
+    league_id,
+    entry_id,
+    SUM(total_points) AS total_points_last_4_gw
+FROM `{project_id}.{dataset_id}.mat_manager_gameweek`
+WHERE gameweek > current_gw - 4
+  AND lineup = 'On Field'
+GROUP BY 1, 2;
+
+-- Per-player totals with names and draft position (agg_player_contribution, agg_draft_picks_analysis)
+CREATE TEMP TABLE player_totals AS
+SELECT
+    r.league_id,
+    r.entry_id,
+    r.manager_name,
+    r.element_id,
+    p.web_name,
+    r.points,
+    CASE
+        WHEN dp.round IS NOT NULL AND dp.round <= 3 THEN 1
+        WHEN dp.pick IS NOT NULL THEN dp.pick
+        ELSE 999
+    END as pick,
+    CASE
+        WHEN dp.round IS NOT NULL THEN dp.round
+        ELSE 99
+    END as round,
+    CASE
+        WHEN dp.round IS NOT NULL AND dp.round <= 3 THEN 'First 3 Picks'
+        WHEN dp.pick IS NOT NULL THEN 'Other Picks'
+        ELSE 'Transfer'
+    END as pick_bucket
+FROM rollup r
+JOIN `{project_id}.{dataset_id}.dim_elements` p ON r.element_id = p.id
+LEFT JOIN `{project_id}.{dataset_id}.fact_draft_picks` dp
+    ON r.element_id = dp.element
+    AND r.entry_id = dp.entry
+    AND r.league_id = dp.league_id
+WHERE r.by_element AND r.lineup = 'On Field';
+
+INSERT INTO `{project_id}.{dataset_id}.league_snapshot`
+WITH
+manager_totals AS (
+    SELECT
+        r.league_id,
+        r.entry_id,
+        r.manager_name,
+        SUM(IF(r.lineup = 'On Field', r.points, 0)) AS total_points,
+        ANY_VALUE(COALESCE(rp.total_points_last_4_gw, 0)) AS total_points_last_4_gw,
+        SUM(IF(r.lineup = 'Sub', r.points, 0)) AS bench_points,
+        COUNTIF(r.lineup = 'On Field') > 0 AS has_field,
+        COUNTIF(r.lineup = 'Sub') > 0 AS has_bench
+    FROM rollup r
+    LEFT JOIN recent_points rp
+        ON r.league_id = rp.league_id AND r.entry_id = rp.entry_id
+    WHERE NOT r.by_gameweek AND NOT r.by_element
+    GROUP BY 1, 2, 3
+),
+standings AS (
+    SELECT
+        *,
+        RANK() OVER (PARTITION BY league_id ORDER BY total_points DESC) as rank
+    FROM manager_totals
+    WHERE has_field
+),
+contributions AS (
+    SELECT league_id, entry_id, manager_name, web_name, SUM(points) as total_points
+    FROM player_totals
+    GROUP BY 1, 2, 3, 4
+),
+draft_analysis AS (
+    SELECT
+        league_id,
+        manager_name,
+        pick,
+        round,
+        element_id,
+        web_name as player_name,
+        COALESCE(SUM(points), 0) as total_points_contributed,
+        pick_bucket
+    FROM player_totals
+    GROUP BY 1, 2, 3, 4, 5, 6, 8
+),
+top_transfers AS (
+    SELECT league_id, player_name, manager_name, SUM(total_points_contributed) as total_points
+    FROM draft_analysis
+    WHERE pick_bucket = 'Transfer'
+    GROUP BY 1, 2, 3
+    QUALIFY ROW_NUMBER() OVER (PARTITION BY league_id ORDER BY SUM(total_points_contributed) DESC) <= 20
+)
+SELECT
+    @refresh_id AS refresh_id,
+    CURRENT_TIMESTAMP() AS refreshed_at,
+    l.league_id,
+    ARRAY(
+        SELECT AS STRUCT entry_id, manager_name, total_points, rank
+        FROM standings s WHERE s.league_id = l.league_id
+        ORDER BY rank ASC
+    ) AS standings,
+    ARRAY(
+        SELECT AS STRUCT entry_id, manager_name, total_points_last_4_gw
+        FROM standings s WHERE s.league_id = l.league_id
+        ORDER BY total_points_last_4_gw DESC
+    ) AS momentum,
+    ARRAY(
+        SELECT AS STRUCT entry_id, manager_name, bench_points
+        FROM manager_totals t WHERE t.league_id = l.league_id AND t.has_bench
+        ORDER BY bench_points DESC
+    ) AS bench_points,
+    ARRAY(
+        SELECT AS STRUCT entry_id, manager_name, web_name, total_points
+        FROM contributions c WHERE c.league_id = l.league_id
+        ORDER BY total_points DESC
+    ) AS contributions,
+    ARRAY(
+        SELECT AS STRUCT gameweek, entry_id, manager_name, points AS weekly_points
+        FROM rollup r WHERE r.league_id = l.league_id AND r.by_gameweek AND r.lineup = 'On Field'
+        ORDER BY gameweek ASC, manager_name ASC
+    ) AS consistency,
+    ARRAY(
+        SELECT AS STRUCT manager_name, pick, round, element_id, player_name, total_points_contributed, pick_bucket
+        FROM draft_analysis d WHERE d.league_id = l.league_id
+        ORDER BY pick ASC
+    ) AS draft_analysis,
+    ARRAY(
+        SELECT AS STRUCT player_name, manager_name, total_points
+        FROM top_transfers t WHERE t.league_id = l.league_id
+        ORDER BY total_points DESC
+    ) AS top_transfers
+FROM (SELECT DISTINCT league_id FROM manager_totals) l;
+
+-- Older refreshes are kept for a week so a bad refresh can be inspected or rolled back
+DELETE FROM `{project_id}.{dataset_id}.league_snapshot`
+WHERE refreshed_at < TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 7 DAY);
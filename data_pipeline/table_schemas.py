@@ -0,0 +1,149 @@
+"""
+Column manifests for the tables written by ingest.py.
+
+Each manifest lists the columns kept for a table and the compact dtype they are
+loaded with. Anything the API returns that is not listed (news, ownership and
+ICT fields, expected_* stats, ...) is dropped before serialization, so it is
+never uploaded, stored or scanned. create_views.sql only reads columns listed
+here; add a column to its manifest before using it in a view.
+
+Stats fit in int16, ids in the smallest int that holds them, and low-cardinality
+strings are categoricals, which Parquet writes dictionary-encoded. The same manifests
+fix the Arrow schema each Parquet file is written with (arrow_table), so a column
+never changes type between loads because of what one payload happened to contain.
+"""
+import pandas as pd
+import pyarrow as pa
+
+TABLE_MANIFESTS = {
+    "dim_elements": {
+        "id": "int16",
+        "web_name": "string",
+        "first_name": "string",
+        "second_name": "string",
+        "team": "int8",
+        "element_type": "int8",
+        "status": "category",
+    },
+    "dim_teams": {
+        "id": "int8",
+        "name": "string",
+        "short_name": "category",
+    },
+    "dim_element_types": {
+        "id": "int8",
+        "singular_name": "category",
+        "singular_name_short": "category",
+    },
+    "dim_entries": {
+        "league_id": "int32",
+        "entry_id": "int32",
+        "entry_name": "string",
+        "player_first_name": "string",
+        "player_last_name": "string",
+        "short_name": "string",
+    },
+    "fact_draft_picks": {
+        "league_id": "int32",
+        "entry": "int32",
+        "element": "int16",
+        "round": "int8",
+        "pick": "int16",
+    },
+    "fact_gameweek_live": {
+        "gameweek": "int16",
+        "element_id": "int16",
+        "total_points": "int16",
+        "minutes": "int16",
+        "goals_scored": "int16",
+        "assists": "int16",
+        "clean_sheets": "int16",
+        "goals_conceded": "int16",
+        "own_goals": "int16",
+        "penalties_saved": "int16",
+        "penalties_missed": "int16",
+        "yellow_cards": "int16",
+        "red_cards": "int16",
+        "saves": "int16",
+        "bonus": "int16",
+        "bps": "int16",
+    },
+    "fact_entry_weekly": {
+        "league_id": "int32",
+        "gameweek": "int16",
+        "entry_id": "int32",
+        "element": "int16",
+        "position": "int8",
+        "multiplier": "int8",
+        "is_captain": "bool",
+        "is_vice_captain": "bool",
+    },
+    "meta_gameweek_watermark": {
+        "league_id": "int32",
+        "gameweek": "int16",
+        "finalized": "bool",
+    },
+}
+
+ARROW_TYPES = {
+    "int8": pa.int8(),
+    "int16": pa.int16(),
+    "int32": pa.int32(),
+    "int64": pa.int64(),
+    "bool": pa.bool_(),
+    "string": pa.string(),
+}
+# Columns added to every table at load time, outside the manifests
+LOAD_COLUMN_TYPES = {
+    "scraped_at": pa.timestamp("us", tz="UTC"),
+}
+
+
+def apply_manifest(df, table_name):
+    """
+    Projects df onto its table's manifest and casts each column to the declared dtype.
+    Manifest columns missing from df are skipped; tables without a manifest pass through.
+    """
+    manifest = TABLE_MANIFESTS.get(table_name)
+    if manifest is None:
+        return df
+
+    columns = {}
+    for column, dtype in manifest.items():
+        if column not in df.columns:
+            continue
+        series = df[column]
+        if series.isna().any():
+            # numpy ints and bools cannot hold nulls; fall back to pandas' nullable types
+            if dtype.startswith("int"):
+                dtype = dtype.capitalize()
+            elif dtype == "bool":
+                dtype = "boolean"
+        columns[column] = series.astype(dtype)
+    return pd.DataFrame(columns, index=df.index)
+
+
+def arrow_schema(df, table_name):
+    """
+    Arrow schema for writing df as table_name: manifest columns get their declared
+    type (categoricals a dictionary of strings), scraped_at a UTC timestamp. Columns
+    of tables without a manifest keep the type inferred from df.
+    """
+    manifest = TABLE_MANIFESTS.get(table_name, {})
+    fields = []
+    for field in pa.Schema.from_pandas(df, preserve_index=False):
+        dtype = manifest.get(field.name)
+        if dtype == "category":
+            index_type = field.type.index_type if pa.types.is_dictionary(field.type) else pa.int32()
+            field = pa.field(field.name, pa.dictionary(index_type, pa.string()))
+        elif dtype is not None:
+            field = pa.field(field.name, ARROW_TYPES[dtype])
+        elif field.name in LOAD_COLUMN_TYPES:
+            field = pa.field(field.name, LOAD_COLUMN_TYPES[field.name])
+        fields.append(field)
+    return pa.schema(fields)
+
+
+def arrow_table(df, table_name):
+    """Converts df to an Arrow table cast to arrow_schema; a value that does not fit its type raises."""
+    return pa.Table.from_pandas(df, preserve_index=False).cast(arrow_schema(df, table_name))
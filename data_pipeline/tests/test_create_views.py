@@ -0,0 +1,62 @@
+import pytest
+from pathlib import Path
+
+from create_views import build_plan, dependency_levels, select_changed, split_statements
+
+
+def test_split_statements_keeps_semicolons_in_strings_identifiers_and_comments():
+    sql = """
+    -- header comment; not a statement
+    CREATE VIEW `p.d.a` AS SELECT ';' AS s, "x;y" AS t, `odd;name` FROM `p.d.t`;
+    /* block; comment */
+    CREATE VIEW `p.d.b` AS SELECT 'it\\'s;' AS s FROM `p.d.a`  # trailing; comment
+    ;
+    -- only a comment;
+    """
+    statements = split_statements(sql)
+    assert len(statements) == 2
+    assert statements[0].endswith("FROM `p.d.t`")
+    assert "'it\\'s;'" in statements[1]
+    assert statements[1].endswith("# trailing; comment")
+
+
+def test_dependency_levels_order_views_after_what_they_read():
+    plan = build_plan(split_statements("""
+        CREATE OR REPLACE VIEW `p.d.c` AS SELECT * FROM `p.d.a` JOIN `p.d.b` USING (id);
+        CREATE OR REPLACE VIEW `p.d.b` AS SELECT * FROM `p.d.a`;
+        CREATE OR REPLACE VIEW `p.d.a` AS SELECT * FROM `p.d.fact_table`;
+        CREATE OR REPLACE VIEW `p.d.z` AS SELECT 1 AS one;
+    """))
+    assert plan["p.d.c"]["depends_on"] == ["p.d.a", "p.d.b"]
+    # Tables outside the script are not dependencies
+    assert plan["p.d.a"]["depends_on"] == []
+    assert dependency_levels(plan) == [["p.d.a", "p.d.z"], ["p.d.b"], ["p.d.c"]]
+
+
+def test_dependency_cycle_raises():
+    plan = build_plan(split_statements("""
+        CREATE VIEW `p.d.a` AS SELECT * FROM `p.d.b`;
+        CREATE VIEW `p.d.b` AS SELECT * FROM `p.d.a`;
+    """))
+    with pytest.raises(ValueError, match="cycle"):
+        dependency_levels(plan)
+
+
+def test_select_changed_includes_everything_downstream():
+    plan = build_plan(split_statements("""
+        CREATE VIEW `p.d.a` AS SELECT 1 AS x;
+        CREATE VIEW `p.d.b` AS SELECT * FROM `p.d.a`;
+        CREATE VIEW `p.d.c` AS SELECT * FROM `p.d.b`;
+        CREATE VIEW `p.d.d` AS SELECT 2 AS y;
+    """))
+    deployed = {name: node["hash"] for name, node in plan.items()}
+    assert select_changed(plan, deployed) == set()
+    deployed["p.d.a"] = "old"
+    assert select_changed(plan, deployed) == {"p.d.a", "p.d.b", "p.d.c"}
+    assert select_changed(plan, deployed, force=True) == set(plan)
+
+
+def test_create_views_sql_plans_without_cycles():
+    sql = (Path(__file__).resolve().parent.parent / "create_views.sql").read_text()
+    plan = build_plan(split_statements(sql.format(project_id="p", dataset_id="d")))
+    assert sum(len(level) for level in dependency_levels(plan)) == len(plan)
@@ -0,0 +1,120 @@
+import os
+import pytest
+
+import http_cache
+from http_cache import ResponseCache, ttl_for
+
+URL = "https://fpl.test/api/event/3/live"
+
+
+class FakeResponse:
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+
+class FakeServer:
+    """Serves body with an ETag and answers a matching If-None-Match with 304."""
+
+    def __init__(self, body=b'{"elements": {}}', etag='"v1"'):
+        self.body = body
+        self.etag = etag
+        self.requests = []
+
+    def send(self, url, headers):
+        self.requests.append(headers)
+        if self.etag is not None and headers.get("If-None-Match") == self.etag:
+            return FakeResponse(304)
+        return FakeResponse(200, self.body, {"ETag": self.etag})
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(directory=tmp_path, max_bytes=1024 * 1024, enabled=True)
+
+
+def test_ttl_for():
+    assert ttl_for(URL, finished_gameweeks={3}) is None
+    assert ttl_for(URL, finished_gameweeks={1, 2}) == http_cache.CURRENT_GAMEWEEK_TTL_SECONDS
+    assert ttl_for("https://fpl.test/api/entry/42/event/3", finished_gameweeks={3}) is None
+    assert ttl_for("https://fpl.test/api/entry/42/event/4/") == http_cache.CURRENT_GAMEWEEK_TTL_SECONDS
+    assert ttl_for("https://fpl.test/api/bootstrap-static/") == http_cache.BOOTSTRAP_TTL_SECONDS
+    assert ttl_for("https://fpl.test/api/league/1/details") == http_cache.DEFAULT_TTL_SECONDS
+
+
+def test_fresh_entry_is_served_without_a_request(cache):
+    server = FakeServer()
+    assert cache.fetch(URL, ttl=60, send=server.send) == server.body
+    assert cache.fetch(URL, ttl=60, send=server.send) == server.body
+    assert len(server.requests) == 1
+    assert (cache.misses, cache.hits) == (1, 1)
+
+
+def test_entry_cached_while_live_is_revalidated_once_after_the_gameweek_finishes(cache):
+    server = FakeServer()
+    cache.fetch(URL, ttl=60, send=server.send)
+
+    # The gameweek has finished since: ttl_for now returns None
+    assert cache.fetch(URL, ttl=None, send=server.send) == server.body
+    assert server.requests[-1] == {"If-None-Match": '"v1"'}
+    assert cache.revalidated == 1
+
+    # Revalidated after finishing, so it is final from now on
+    assert cache.fetch(URL, ttl=None, send=server.send) == server.body
+    assert len(server.requests) == 2
+    assert cache.hits == 1
+
+
+def test_entry_fetched_after_the_gameweek_finished_is_final(cache):
+    server = FakeServer()
+    cache.fetch(URL, ttl=None, send=server.send)
+    cache.fetch(URL, ttl=None, send=server.send)
+    assert len(server.requests) == 1
+
+
+def test_changed_body_after_finishing_replaces_the_live_one(cache):
+    cache.fetch(URL, ttl=60, send=FakeServer(b"live", '"v1"').send)
+    final = FakeServer(b"with bonus points", '"v2"')
+    assert cache.fetch(URL, ttl=None, send=final.send) == b"with bonus points"
+    assert cache.fetch(URL, ttl=None, send=final.send) == b"with bonus points"
+    assert len(final.requests) == 1
+
+
+def test_non_200_is_not_cached(cache):
+    assert cache.fetch(URL, ttl=60, send=lambda url, headers: FakeResponse(404)) is None
+    assert cache.fetch(URL, ttl=60, send=FakeServer().send) is not None
+    assert cache.misses == 1
+
+
+def test_body_evicted_mid_read_is_a_miss(cache, monkeypatch):
+    server = FakeServer()
+    cache.fetch(URL, ttl=60, send=server.send)
+
+    utime = os.utime
+
+    def evict_then_utime(path, *args, **kwargs):
+        # Eviction unlinks the body between read_bytes and utime
+        os.unlink(path)
+        return utime(path, *args, **kwargs)
+
+    monkeypatch.setattr(http_cache.os, "utime", evict_then_utime)
+    assert cache.fetch(URL, ttl=60, send=server.send) == server.body
+    monkeypatch.setattr(http_cache.os, "utime", utime)
+
+    # Stored again rather than pointing at the evicted body
+    assert cache.fetch(URL, ttl=60, send=server.send) == server.body
+    assert len(server.requests) == 2
+
+
+def test_eviction_drops_the_least_recently_used_body(tmp_path):
+    cache = ResponseCache(directory=tmp_path, max_bytes=2500, enabled=True)
+    cache.fetch(f"{URL}?0", ttl=60, send=FakeServer(b"0" * 1000).send)
+    # Last used long ago
+    os.utime(next(cache.objects_dir.iterdir()), (0, 0))
+    cache.fetch(f"{URL}?1", ttl=60, send=FakeServer(b"1" * 1000).send)
+    cache.fetch(f"{URL}?2", ttl=60, send=FakeServer(b"2" * 1000).send)
+
+    remaining = {path.read_bytes()[:1] for path in cache.objects_dir.iterdir()}
+    assert remaining == {b"1", b"2"}
+    assert not any(cache.tmp_dir.iterdir())
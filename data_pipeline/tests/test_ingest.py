@@ -0,0 +1,122 @@
+import pandas as pd
+import pytest
+
+import ingest
+from local_store import LocalStore
+
+
+def weekly(rows):
+    return pd.DataFrame(rows, columns=["league_id", "gameweek", "entry_id", "element"])
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Records delete_rows and load calls, in order, instead of running them."""
+    calls = []
+    monkeypatch.setattr(ingest, "delete_rows", lambda client, table_name, **filters: calls.append(("delete", table_name, filters)))
+    monkeypatch.setattr(ingest, "load_dataframe_to_bigquery", lambda client, df, table_name, write_disposition: calls.append(("load", table_name, write_disposition)))
+    return calls
+
+
+def test_replace_gameweeks_deletes_only_the_fetched_gameweeks(calls):
+    df = pd.DataFrame({"gameweek": [3, 3, 5], "element_id": [1, 2, 1]})
+    ingest.replace_gameweeks(object(), df, "fact_gameweek_live", [3, 4, 5])
+    assert calls == [
+        ("delete", "fact_gameweek_live", {"gameweeks": [3, 5]}),
+        ("load", "fact_gameweek_live", "WRITE_APPEND"),
+    ]
+
+
+def test_replace_gameweeks_deletes_only_the_fetched_league_gameweeks(calls):
+    df = weekly([(1, 3, 10, 7), (2, 4, 20, 8)])
+    ingest.replace_gameweeks(object(), df, "fact_entry_weekly", [3, 4], league_gameweeks={1: [3, 4], 2: [3, 4], 3: [4]})
+    assert calls[0] == ("delete", "fact_entry_weekly", {"league_gameweeks": {1: [3], 2: [4]}})
+    assert calls[1] == ("load", "fact_entry_weekly", "WRITE_APPEND")
+
+
+def test_replace_gameweeks_with_nothing_fetched_keeps_the_rows(calls):
+    ingest.replace_gameweeks(object(), weekly([]), "fact_entry_weekly", [3], league_gameweeks={1: [3]})
+    assert calls == []
+
+
+def test_replace_leagues_locally_keeps_other_leagues(tmp_path):
+    store = LocalStore(tmp_path)
+    store.write_table(weekly([(1, 1, 10, 7), (2, 1, 20, 8)]), "fact_entry_weekly")
+    store.write_table(pd.DataFrame({"league_id": [1, 2], "gameweek": [1, 1], "finalized": [True, True]}), ingest.WATERMARK_TABLE)
+    store.write_table(pd.DataFrame({"id": [1], "name": ["Arsenal"], "short_name": ["ARS"]}), "dim_teams")
+
+    ingest.replace_leagues(store, {
+        "fact_entry_weekly": weekly([(1, 1, 10, 9), (1, 2, 10, 9)]),
+        "dim_teams": pd.DataFrame({"id": [2], "name": ["Chelsea"], "short_name": ["CHE"]}),
+    })
+
+    rows = store.read_table("fact_entry_weekly").sort_values(["league_id", "gameweek"])
+    assert rows[["league_id", "gameweek", "element"]].values.tolist() == [[1, 1, 9], [1, 2, 9], [2, 1, 8]]
+    # The replaced league is refetched in full by the next incremental run
+    assert store.read_table(ingest.WATERMARK_TABLE)["league_id"].tolist() == [2]
+    # Global tables are truncated
+    assert store.read_table("dim_teams")["id"].tolist() == [2]
+
+
+class FakeBigQueryClient:
+    project = "p"
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    def delete_table(self, table_id, not_found_ok=False):
+        self.calls.append(("drop", table_id))
+
+
+@pytest.fixture
+def bigquery_calls(monkeypatch):
+    calls = []
+    monkeypatch.setattr(ingest, "table_exists", lambda client, table_id: not table_id.endswith("dim_entries"))
+    monkeypatch.setattr(ingest, "swap_in_staging", lambda client, staging, league_ids: calls.append(("swap", staging, league_ids)))
+    return calls
+
+
+def test_replace_leagues_swaps_staging_in_after_every_load(monkeypatch, bigquery_calls):
+    def load(client, frames, write_disposition, destinations):
+        bigquery_calls.append(("load", write_disposition, destinations))
+
+    monkeypatch.setattr(ingest, "load_dataframes_to_bigquery", load)
+    ingest.replace_leagues(FakeBigQueryClient(bigquery_calls), {
+        "fact_entry_weekly": weekly([(2, 1, 20, 8), (1, 1, 10, 7)]),
+        "dim_entries": pd.DataFrame({"league_id": [1], "entry_id": [10]}),
+        "dim_teams": pd.DataFrame({"id": [1]}),
+    })
+
+    staging = {"fact_entry_weekly": "fact_entry_weekly__staging"}
+    assert bigquery_calls == [
+        # A table that does not exist yet is appended to directly
+        ("load", {"fact_entry_weekly": "WRITE_TRUNCATE", "dim_entries": "WRITE_APPEND", "dim_teams": "WRITE_TRUNCATE"}, staging),
+        ("swap", staging, {"fact_entry_weekly": [1, 2], "dim_entries": [1]}),
+        ("drop", f"p.{ingest.BQ_DATASET_ID}.fact_entry_weekly__staging"),
+    ]
+
+
+def test_replace_leagues_failed_load_swaps_nothing_in(monkeypatch, bigquery_calls):
+    def load(client, frames, write_disposition, destinations):
+        raise RuntimeError("Load jobs failed for: fact_entry_weekly")
+
+    monkeypatch.setattr(ingest, "load_dataframes_to_bigquery", load)
+    with pytest.raises(RuntimeError):
+        ingest.replace_leagues(FakeBigQueryClient(bigquery_calls), {"fact_entry_weekly": weekly([(1, 1, 10, 7)])})
+    assert bigquery_calls == [("drop", f"p.{ingest.BQ_DATASET_ID}.fact_entry_weekly__staging")]
+
+
+def test_parse_gameweek_live_decodes_only_manifest_stats():
+    payload = {"elements": {
+        "7": {"stats": {"total_points": 12, "minutes": 90, "bonus": 3, "influence": "55.2", "in_dreamteam": True}},
+        "8": {"stats": {"total_points": 1, "minutes": None}},
+    }}
+    df = ingest.parse_gameweek_live(payload, 4)
+    manifest = ingest.TABLE_MANIFESTS["fact_gameweek_live"]
+    assert set(df.columns) == set(manifest)
+    assert df["element_id"].tolist() == [7, 8]
+    assert df["gameweek"].tolist() == [4, 4]
+    assert df["total_points"].tolist() == [12, 1]
+    assert df["minutes"].tolist() == [90, 0]
+    assert all(df[column].dtype == manifest[column] for column in manifest)
+    assert ingest.parse_gameweek_live({"elements": {}}, 4).empty
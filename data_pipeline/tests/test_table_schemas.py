@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from table_schemas import apply_manifest, arrow_table
+
+
+def test_apply_manifest_projects_and_casts():
+    df = pd.DataFrame({
+        "id": [1, 2],
+        "web_name": ["Salah", "Saka"],
+        "status": ["a", "a"],
+        "news": ["", "knock"],
+        "team": [12, 1],
+    })
+    out = apply_manifest(df, "dim_elements")
+    assert list(out.columns) == ["id", "web_name", "team", "status"]
+    assert out["id"].dtype == np.int16
+    assert out["team"].dtype == np.int8
+    assert out["status"].dtype == "category"
+
+
+def test_apply_manifest_uses_nullable_dtypes_for_missing_values():
+    df = pd.DataFrame({"league_id": [1, 1], "gameweek": [1, None], "finalized": [True, None]})
+    out = apply_manifest(df, "meta_gameweek_watermark")
+    assert out["gameweek"].dtype == "Int16"
+    assert out["finalized"].dtype == "boolean"
+
+
+def test_apply_manifest_passes_unknown_tables_through():
+    df = pd.DataFrame({"x": [1.5]})
+    assert apply_manifest(df, "not_a_table") is df
+
+
+def test_arrow_table_fixes_types_regardless_of_payload():
+    df = pd.DataFrame({
+        "league_id": [1, 2],
+        "gameweek": [3, 3],
+        # An all-null column would otherwise be inferred as type null
+        "finalized": pd.array([None, None], dtype="boolean"),
+        "scraped_at": pd.Timestamp("2026-01-01"),
+    })
+    table = arrow_table(df, "meta_gameweek_watermark")
+    assert table.schema.field("league_id").type == pa.int32()
+    assert table.schema.field("gameweek").type == pa.int16()
+    assert table.schema.field("finalized").type == pa.bool_()
+    assert table.schema.field("scraped_at").type == pa.timestamp("us", tz="UTC")
+
+
+def test_arrow_table_categoricals_are_dictionary_strings():
+    df = apply_manifest(pd.DataFrame({"id": [1], "name": ["Arsenal"], "short_name": ["ARS"]}), "dim_teams")
+    field = arrow_table(df, "dim_teams").schema.field("short_name")
+    assert pa.types.is_dictionary(field.type) and field.type.value_type == pa.string()
+
+
+def test_arrow_table_rejects_values_that_do_not_fit():
+    df = pd.DataFrame({"league_id": [1], "gameweek": [40000], "finalized": [True]})
+    with pytest.raises(pa.ArrowInvalid):
+        arrow_table(df, "meta_gameweek_watermark")
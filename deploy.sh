@@ -42,7 +42,9 @@ gcloud run deploy fpl-api \
   --set-env-vars GCP_PROJECT_ID=$PROJECT_ID,BQ_DATASET_ID=$DATASET_ID \
   --timeout 300 \
   --memory 512Mi \
-  --cpu 1
+  --cpu 1 \
+  --no-cpu-throttling \
+  --min-instances 1
 
 # Get backend URL
 BACKEND_URL=$(gcloud run services describe fpl-api --region $REGION --format='value(status.url)')
@@ -1,5 +1,5 @@
 import { Card } from '@tremor/react';
-import { getStandings, getMomentum, getBenchPoints, getConsistency, getContributions, getDraftAnalysis, getTopTransfers } from '@/lib/api';
+import { getDashboard } from '@/lib/api';
 import { StandingsChart } from '@/components/charts/StandingsChart';
 import { MomentumChart } from '@/components/charts/MomentumChart';
 import { PointsAheadChart } from '@/components/charts/PointsAheadChart';
@@ -11,15 +11,15 @@ import { DraftAnalysisChart } from '@/components/charts/DraftAnalysisChart';
 import { TopTransfersChart } from '@/components/charts/TopTransfersChart';
 
 export default async function Dashboard() {
-  const [standings, momentum, benchPoints, consistency, contributions, draftAnalysis, topTransfers] = await Promise.all([
-    getStandings(),
-    getMomentum(),
-    getBenchPoints(),
-    getConsistency(),
-    getContributions(),
-    getDraftAnalysis(),
-    getTopTransfers()
-  ]);
+  const {
+    standings,
+    momentum,
+    bench_points: benchPoints,
+    consistency,
+    contributions,
+    draft_analysis: draftAnalysis,
+    top_transfers: topTransfers,
+  } = await getDashboard();
 
   return (
     <main className="p-4 md:p-10 mx-auto max-w-7xl">
@@ -1,4 +1,7 @@
 const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
+// The API sends ETag / Cache-Control from its data version, which only moves on refresh,
+// so responses are reused for a minute instead of refetched on every render
+const FETCH_OPTIONS: RequestInit = { next: { revalidate: 60 } };
 
 export interface Standing {
     entry_id: number;
@@ -44,37 +47,37 @@ export interface DraftPickAnalysis {
 }
 
 export async function getStandings(): Promise<Standing[]> {
-    const res = await fetch(`${API_URL}/standings`, { cache: 'no-store' });
+    const res = await fetch(`${API_URL}/standings`, FETCH_OPTIONS);
     if (!res.ok) throw new Error('Failed to fetch standings');
     return res.json();
 }
 
 export async function getMomentum(): Promise<MomentumEntry[]> {
-    const res = await fetch(`${API_URL}/momentum`, { cache: 'no-store' });
+    const res = await fetch(`${API_URL}/momentum`, FETCH_OPTIONS);
     if (!res.ok) throw new Error('Failed to fetch momentum');
     return res.json();
 }
 
 export async function getBenchPoints(): Promise<BenchPointsEntry[]> {
-    const res = await fetch(`${API_URL}/bench-points`, { cache: 'no-store' });
+    const res = await fetch(`${API_URL}/bench-points`, FETCH_OPTIONS);
     if (!res.ok) throw new Error('Failed to fetch bench points');
     return res.json();
 }
 
 export async function getConsistency(): Promise<ConsistencyEntry[]> {
-    const res = await fetch(`${API_URL}/consistency`, { cache: 'no-store' });
+    const res = await fetch(`${API_URL}/consistency`, FETCH_OPTIONS);
     if (!res.ok) throw new Error('Failed to fetch consistency');
     return res.json();
 }
 
 export async function getContributions(): Promise<PlayerContribution[]> {
-    const res = await fetch(`${API_URL}/contributions`, { cache: 'no-store' });
+    const res = await fetch(`${API_URL}/contributions`, FETCH_OPTIONS);
     if (!res.ok) throw new Error('Failed to fetch contributions');
     return res.json();
 }
 
 export async function getDraftAnalysis(): Promise<DraftPickAnalysis[]> {
-    const res = await fetch(`${API_URL}/draft-analysis`, { cache: 'no-store' });
+    const res = await fetch(`${API_URL}/draft-analysis`, FETCH_OPTIONS);
     if (!res.ok) throw new Error('Failed to fetch draft analysis');
     return res.json();
 }
@@ -86,7 +89,27 @@ export interface TopTransfersEntry {
 }
 
 export async function getTopTransfers(): Promise<TopTransfersEntry[]> {
-    const res = await fetch(`${API_URL}/top-transfers`, { cache: 'no-store' });
+    const res = await fetch(`${API_URL}/top-transfers`, FETCH_OPTIONS);
     if (!res.ok) throw new Error('Failed to fetch top transfers');
     return res.json();
 }
+
+export interface Dashboard {
+    standings: Standing[];
+    momentum: MomentumEntry[];
+    bench_points: BenchPointsEntry[];
+    contributions: PlayerContribution[];
+    consistency: ConsistencyEntry[];
+    draft_analysis: DraftPickAnalysis[];
+    top_transfers: TopTransfersEntry[];
+}
+
+export type DashboardField = keyof Dashboard;
+
+// Every chart's dataset in one round trip; pass fields to fetch only some of them
+export async function getDashboard<F extends DashboardField = DashboardField>(fields?: F[]): Promise<Pick<Dashboard, F>> {
+    const query = fields ? `?fields=${fields.join(',')}` : '';
+    const res = await fetch(`${API_URL}/dashboard${query}`, FETCH_OPTIONS);
+    if (!res.ok) throw new Error('Failed to fetch dashboard');
+    return res.json();
+}
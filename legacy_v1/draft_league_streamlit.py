@@ -11,10 +11,25 @@ st.set_page_config(
 import pandas as pd
 import numpy as np
 import plotly.express as px
-import requests
 import json
+import sys
+from pathlib import Path
 from matplotlib import pyplot as plt
 
+# Reuse the data pipeline's on-disk API response cache
+sys.path.append(str(Path(__file__).resolve().parent.parent / "data_pipeline"))
+from http_cache import ResponseCache, ttl_for
+
+response_cache = ResponseCache()
+
+
+def get_api_content(url, finished_gameweeks=()):
+    # Finished gameweeks are served from disk forever, the rest revalidated per TTL
+    content = response_cache.fetch(url, ttl_for(url, finished_gameweeks))
+    if content is None:
+        raise RuntimeError(f"FPL API request failed (non-200 response): {url}")
+    return content
+
 
 team_color_dict = {
     "Wirtzuose": "#F1C40F",  # fe4a49',
@@ -59,18 +74,23 @@ st.text("Load data")
 def load_data():
     # Create next gw variable
     # ------------------------------
-    r = requests.get(
+    bootstrap_content = get_api_content(
         "https://draft.premierleague.com/api/bootstrap-static"
     )  # Generic endpoint with a bunch of data
-    next_gw = json.loads(r.content)["events"]["next"]
+    next_gw = json.loads(bootstrap_content)["events"]["next"]
     if next_gw is None:
         next_gw = 39
+    finished_gws = {
+        e["id"]
+        for e in json.loads(bootstrap_content)["events"]["data"]
+        if e["finished"] and e.get("data_checked", True)
+    }
     # Get element (player) meta data
     # ------------------------------
-    teams = pd.json_normalize(json.loads(r.content)["teams"])[
+    teams = pd.json_normalize(json.loads(bootstrap_content)["teams"])[
         ["id", "code", "short_name", "name"]
     ]
-    positions = pd.json_normalize(json.loads(r.content)["element_types"])[
+    positions = pd.json_normalize(json.loads(bootstrap_content)["element_types"])[
         ["id", "singular_name_short"]
     ]
 
@@ -87,7 +107,7 @@ def load_data():
         "element_type",
     ]
     summary = pd.json_normalize(
-        json.loads(r.content)["elements"]
+        json.loads(bootstrap_content)["elements"]
     )  # This has data to date
 
     players_df = summary[columns].merge(
@@ -113,9 +133,10 @@ def load_data():
 
     for gw in range(1, next_gw):  # Loop through the gw stats
         stats_response = json.loads(
-            requests.get(
-                "https://draft.premierleague.com/api/event/" + str(gw) + "/live"
-            ).content
+            get_api_content(
+                "https://draft.premierleague.com/api/event/" + str(gw) + "/live",
+                finished_gws,
+            )
         )["elements"]
         for e, p in zip(players_df.id, players_df.web_name):
             try:
@@ -143,9 +164,9 @@ def load_data():
     # This end point uses our league and gets the choices in the draft
     # ------------------------------------------------------------
 
-    choices = requests.get("https://draft.premierleague.com/api/draft/4193/choices")
+    choices = get_api_content("https://draft.premierleague.com/api/draft/4193/choices")
     teams_draft_picks = pd.json_normalize(
-        json.loads(choices.content)["choices"]
+        json.loads(choices)["choices"]
     )  # This has the draft picks
 
     teams_fpl = teams_draft_picks[["entry", "entry_name"]].drop_duplicates(
@@ -161,12 +182,13 @@ def load_data():
         teams_fpl.entry, teams_fpl.entry_name
     ):  # loop through each fpl team
         for i in range(1, next_gw):
-            c = requests.get(
+            c = get_api_content(
                 "https://draft.premierleague.com/api/entry/"
                 + str(entry)
                 + "/event/"
-                + str(i)
-            ).content  # this has weekly stats
+                + str(i),
+                finished_gws,
+            )  # this has weekly stats
             subs_df = pd.json_normalize(json.loads(c)["subs"])
             picks_df = pd.json_normalize(json.loads(c)["picks"])
             picks_df["gameweek"] = i